@@ -1,49 +1,888 @@
-from flask import Flask, request, render_template
-from SPARQLWrapper import SPARQLWrapper, JSON
-import spacy
+import functools
+import gc
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection, HTTPException, HTTPSConnection, BadStatusLine
+from queue import Empty, Full, LifoQueue
+from urllib.parse import urlencode, urlsplit
+
+from flask import Flask, jsonify, request, render_template
 
 app = Flask(__name__)
-nlp = spacy.load("en_core_web_sm")  # Load spaCy model
-sparql = SPARQLWrapper("http://localhost:3030/ds/query")  # Jena Fuseki endpoint
-sparql.setReturnFormat(JSON)
+app.config['KNOWLEDGE_BACKEND'] = os.environ.get('KNOWLEDGE_BACKEND', 'fuseki')  # 'fuseki', or 'embedded' to answer from RDF_DATA in-process
+app.config['RDF_DATA'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'appData', 'testData.ttl')  # Parsed once at startup by the embedded backend
+app.config['SPARQL_ENDPOINT'] = os.environ.get('SPARQL_ENDPOINT', 'http://localhost:3030/ds/query')  # Jena Fuseki endpoint
+app.config['SPARQL_TIMEOUT'] = 5.0  # Seconds allowed per query, connecting included
+app.config['SPARQL_POOL_SIZE'] = 8  # Idle keep-alive connections kept open to the endpoint
+app.config['SPARQL_CACHE_SIZE'] = 1024  # Result sets cached, least recently used dropped first
+app.config['SPARQL_CACHE_TTL'] = 300  # Seconds a cached result set is served before it is queried again
+app.config['SPACY_MODEL'] = os.environ.get('SPACY_MODEL', 'en_core_web_sm')  # spaCy pipeline used to find entities in questions
+app.config['SPACY_EXCLUDE'] = os.environ.get('SPACY_EXCLUDE', 'tok2vec,tagger,parser,attribute_ruler,lemmatizer,senter')  # Components never loaded (comma-separated); only doc.ents is read
+app.config['ENTITY_MATCHER'] = os.environ.get('ENTITY_MATCHER', 'gazetteer')  # 'gazetteer': names known to the knowledge base; 'ner': spaCy's statistical NER
+app.config['GAZETTEER_REFRESH'] = 60  # Seconds between gazetteer refreshes from Fuseki; the embedded store refreshes on change
+app.config['NLP_BATCH_SIZE'] = 64  # Questions per nlp.pipe batch on the batch API
+app.config['NLP_PROCESSES'] = 1  # nlp.pipe worker processes on the batch API (spaCy n_process)
+app.config['BATCH_QUERY_MODE'] = 'values'  # 'values': one combined VALUES query per batch; 'concurrent': one query per store, in parallel
+app.config['BATCH_QUERY_THREADS'] = 8  # Queries in flight at once in 'concurrent' mode
+app.config['BATCH_MAX_QUESTIONS'] = 1000  # Longest question list /api/questions accepts
+app.config['NLP_PRELOAD'] = os.environ.get('NLP_PRELOAD') == '1'  # Load and warm up at import, e.g. in a gunicorn --preload master
+
+# NLP pipeline
+# The spaCy model is loaded on first use, not at import, so tools that import
+# the app without asking questions never pay for it. Only the components
+# generate_sparql_query needs are loaded (en_core_web_sm's ner has its own
+# tok2vec). With NLP_PRELOAD=1 the pipeline is loaded and warmed up at import
+# and the heap is frozen, so workers forked afterwards share its memory.
+class NlpService:
+    """Lazily loaded spaCy pipeline, safe to share between threads"""
+
+    def __init__(self, model, exclude=()):
+        self.model = model
+        self.exclude = list(exclude)
+        self.pipeline = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        if self.pipeline is None:
+            with self.lock:
+                if self.pipeline is None:
+                    import spacy
+                    self.pipeline = spacy.load(self.model, exclude=self.exclude)
+        return self.pipeline
+
+    def warm_up(self):
+        """Load the pipeline and run one question through it, so the first request does not pay for either"""
+        started = time.perf_counter()
+        self.load()("Who owns QuickMart?")
+        return time.perf_counter() - started
+
+    def __call__(self, text):
+        return self.load()(text)
+
+    def pipe(self, texts, **kwargs):
+        return self.load().pipe(texts, **kwargs)
+
+nlp = NlpService(app.config['SPACY_MODEL'], [name for name in app.config['SPACY_EXCLUDE'].split(',') if name])
+if app.config['NLP_PRELOAD']:
+    nlp.warm_up()
+    gc.freeze()  # Keep the collector from touching (and so copying) preloaded objects in forked workers
+
+# SPARQL client
+# One client is shared by every request thread. Queries are POSTed over a pool
+# of keep-alive connections (a connection is used by one thread at a time) and
+# result sets are cached by query text, so a repeated question never reaches
+# the endpoint until its entry expires.
+class SparqlError(Exception):
+    """The SPARQL endpoint could not be reached or rejected a query"""
+
+def normalize_query(query):
+    """Cache key of a query: comments dropped and whitespace collapsed outside string literals and IRIs
+
+    The key is only used for the cache; a '#' comment runs to the end of its
+    line, so the collapsed text is not a valid query to send.
+    """
+    protected = r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|<[^<>"{}|^`\\\s]*>'
+    return re.sub(rf'({protected})|(?:\s|#[^\n]*)+', lambda m: m.group(1) or ' ', query).strip()
+
+class ResultCache:
+    """Thread-safe LRU cache whose entries expire ttl seconds after they are stored"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+class SparqlClient:
+    """SPARQL protocol client, safe to share between threads"""
+
+    def __init__(self, endpoint, timeout=5.0, pool_size=8, cache=None):
+        parts = urlsplit(endpoint)
+        self.connection_class = HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+        self.host, self.port = parts.hostname, parts.port
+        self.path = parts.path or '/'
+        self.timeout = timeout
+        self.pool = LifoQueue(maxsize=pool_size)
+        self.cache = cache
+
+    def query(self, query, timeout=None, cache=True):
+        """Run a SELECT query and return the decoded application/sparql-results+json document
+
+        Cached documents are shared between callers and must not be modified.
+        With cache=False the endpoint is always asked and the result is not
+        cached, for callers that poll for changes.
+        """
+        use_cache = cache and self.cache is not None
+        key = normalize_query(query) if use_cache else None
+        if use_cache:
+            results = self.cache.get(key)
+            if results is not None:
+                return results
+        results = self._post(query, self.timeout if timeout is None else timeout)
+        if use_cache:
+            self.cache.put(key, results)
+        return results
+
+    def _post(self, query, timeout):
+        body = urlencode({'query': query})
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Accept': 'application/sparql-results+json',
+        }
+        # A pooled connection may have been closed by the server while idle;
+        # that shows up on first use. The other idle connections were most
+        # likely closed too (a server restart or idle timeout), so they are
+        # dropped and the request is retried once on a new connection
+        for attempt in range(2):
+            connection = self._acquire(timeout, fresh=attempt > 0)
+            reused = connection.sock is not None
+            try:
+                connection.request('POST', self.path, body, headers)
+                response = connection.getresponse()
+                payload = response.read()
+            except (ConnectionError, BadStatusLine) as e:
+                connection.close()
+                if reused and attempt == 0:
+                    self.close()
+                    continue
+                raise SparqlError(f"SPARQL endpoint connection failed: {e}") from e
+            except (OSError, HTTPException) as e:
+                connection.close()
+                raise SparqlError(f"SPARQL query failed: {e}") from e
+            self._release(connection, response)
+            if response.status != 200:
+                raise SparqlError(f"SPARQL endpoint returned {response.status} {response.reason}: {payload[:200]!r}")
+            return json.loads(payload)
+
+    def _acquire(self, timeout, fresh=False):
+        connection = None
+        if not fresh:
+            try:
+                connection = self.pool.get_nowait()
+            except Empty:
+                pass
+        if connection is None:
+            connection = self.connection_class(self.host, self.port)
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        return connection
+
+    def _release(self, connection, response):
+        if response.will_close:
+            connection.close()
+            return
+        try:
+            self.pool.put_nowait(connection)
+        except Full:
+            connection.close()
+
+    def close(self):
+        """Close every idle pooled connection"""
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except Empty:
+                return
+
+# Embedded RDF store
+# The whole dataset is parsed once into three nested-dict indexes (subject →
+# predicate → objects, predicate → object → subjects, object → subject →
+# predicates), so any triple pattern with at least one bound term is a dict
+# lookup. query() takes the same SPARQL text as the Fuseki client and returns
+# the same application/sparql-results+json document. The Turtle and SPARQL
+# readers cover what this app uses: prefixed names, IRIs, "a", plain, tagged
+# and typed literals, numbers, ';' and ',' lists, and SELECT [DISTINCT] over
+# a basic graph pattern with an optional VALUES block and LIMIT. Blank nodes,
+# collections, long strings and UNDEF are not supported.
+RDF_TYPE = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type'
+XSD = 'http://www.w3.org/2001/XMLSchema#'
+
+class IRI(str):
+    __slots__ = ()
 
-def generate_sparql_query(question):
-    doc = nlp(question)
+class Variable(str):
+    __slots__ = ()
+
+Literal = namedtuple('Literal', ['value', 'lang', 'datatype'])
+
+RDF_TOKEN = re.compile(r'''
+    (?P<space>\s+|\#[^\n]*)
+  | (?P<iri><[^<>"{}|^`\\\s]*>)
+  | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+    (?:@(?P<lang>[A-Za-z]+(?:-[A-Za-z0-9]+)*)|\^\^(?P<datatype><[^>\s]*>|[A-Za-z][\w-]*:[\w-]+))?
+  | (?P<var>[?$]\w+)
+  | (?P<number>[+-]?\d+(?:\.\d+)?(?![\w:]))
+  | (?P<pname>(?:[A-Za-z][\w-]*)?:(?:[\w-]+(?:\.[\w-]+)*)?)
+  | (?P<word>@?[A-Za-z]\w*)
+  | (?P<punct>[.;,{}()*])
+''', re.X)
+
+STRING_ESCAPE = re.compile(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)')
+STRING_ESCAPES = {'t': '\t', 'n': '\n', 'r': '\r', 'b': '\b', 'f': '\f'}
+
+def unescape(text):
+    def replace(match):
+        code = match.group(1)
+        if code[0] in 'uU' and len(code) > 1:
+            return chr(int(code[1:], 16))
+        return STRING_ESCAPES.get(code, code)
+    return STRING_ESCAPE.sub(replace, text)
+
+class RdfReader:
+    """Token reader shared by the Turtle loader and the SPARQL query parser"""
+
+    def __init__(self, text):
+        self.tokens = []
+        position = 0
+        while position < len(text):
+            match = RDF_TOKEN.match(text, position)
+            if match is None:
+                line = text.count('\n', 0, position) + 1
+                raise ValueError(f"Unexpected {text[position]!r} on line {line}")
+            kind = 'string' if match.lastgroup in ('lang', 'datatype') else match.lastgroup
+            if kind != 'space':
+                self.tokens.append((kind, match))
+            position = match.end()
+        self.position = 0
+        self.prefixes = {}
+
+    def peek(self):
+        """Text of the next token, or None at the end"""
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][1].group()
+        return None
+
+    def accept(self, *values):
+        """Consume the next token if it is one of values (keywords ignore case)"""
+        value = self.peek()
+        if value is not None and (value in values or value.upper() in values):
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, *values):
+        if not self.accept(*values):
+            raise ValueError(f"Expected {' or '.join(values)}, found {self.peek()!r}")
+
+    def iri(self, kind, text):
+        if kind == 'iri':
+            return IRI(text[1:-1])
+        if kind == 'pname':
+            prefix, _, local = text.partition(':')
+            if prefix not in self.prefixes:
+                raise ValueError(f"Undeclared prefix {prefix + ':'!r}")
+            return IRI(self.prefixes[prefix] + local)
+        raise ValueError(f"Expected an IRI, found {text!r}")
+
+    def next(self):
+        if self.position >= len(self.tokens):
+            raise ValueError("Unexpected end of input")
+        self.position += 1
+        return self.tokens[self.position - 1]
+
+    def term(self, variables=False):
+        """Read one subject, predicate or object"""
+        kind, match = self.next()
+        if kind == 'string':
+            datatype = match.group('datatype')
+            if datatype is not None:
+                datatype = self.iri('iri' if datatype.startswith('<') else 'pname', datatype)
+            return Literal(unescape(match.group('string')[1:-1]), match.group('lang'), datatype)
+        if kind == 'number':
+            return Literal(match.group(), None, XSD + ('decimal' if '.' in match.group() else 'integer'))
+        if kind == 'var' and variables:
+            return Variable(match.group()[1:])
+        if kind == 'word' and match.group() == 'a':
+            return IRI(RDF_TYPE)
+        return self.iri(kind, match.group())
+
+    def prefix(self):
+        """Read the rest of a PREFIX / @prefix declaration"""
+        kind, match = self.next()
+        if kind != 'pname' or not match.group().endswith(':'):
+            raise ValueError(f"Expected a prefix name, found {match.group()!r}")
+        iri_kind, iri = self.next()
+        self.prefixes[match.group()[:-1]] = self.iri(iri_kind, iri.group())
+
+    def triples(self, variables=False):
+        """Read one subject with its ';' and ',' separated predicate-object list"""
+        subject = self.term(variables)
+        while True:
+            predicate = self.term(variables)
+            while True:
+                yield subject, predicate, self.term(variables)
+                if not self.accept(','):
+                    break
+            if not self.accept(';') or self.peek() in ('.', '}', None):
+                break
+
+class EmbeddedStore:
+    """In-memory triple store answering the app's SELECT queries"""
+
+    def __init__(self):
+        self.spo = {}
+        self.pos = {}
+        self.osp = {}
+        self.predicate_sizes = {}
+        self.size = 0
+        self.version = 0  # Bumped on every change, so readers can tell their copies are out of date
+
+    @classmethod
+    def load(cls, path):
+        store = cls()
+        with open(path, encoding='utf-8') as handle:
+            store.add_turtle(handle.read())
+        return store
+
+    def add(self, subject, predicate, obj):
+        objects = self.spo.setdefault(subject, {}).setdefault(predicate, set())
+        if obj in objects:
+            return
+        objects.add(obj)
+        self.pos.setdefault(predicate, {}).setdefault(obj, set()).add(subject)
+        self.osp.setdefault(obj, {}).setdefault(subject, set()).add(predicate)
+        self.predicate_sizes[predicate] = self.predicate_sizes.get(predicate, 0) + 1
+        self.size += 1
+        self.version += 1
+
+    def add_turtle(self, text):
+        """Parse a Turtle document and add its triples"""
+        reader = RdfReader(text)
+        while reader.peek() is not None:
+            if reader.accept('@prefix'):
+                reader.prefix()
+                reader.expect('.')
+            elif reader.accept('PREFIX'):
+                reader.prefix()
+            else:
+                for triple in reader.triples():
+                    self.add(*triple)
+                reader.expect('.')
+
+    def match(self, subject=None, predicate=None, obj=None):
+        """Yield the triples matching a pattern; None matches anything"""
+        if subject is not None:
+            by_predicate = self.spo.get(subject, {})
+            if predicate is not None:
+                objects = by_predicate.get(predicate, ())
+                if obj is not None:
+                    if obj in objects:
+                        yield subject, predicate, obj
+                    return
+                for o in objects:
+                    yield subject, predicate, o
+            elif obj is not None:
+                for p in self.osp.get(obj, {}).get(subject, ()):
+                    yield subject, p, obj
+            else:
+                for p, objects in by_predicate.items():
+                    for o in objects:
+                        yield subject, p, o
+        elif predicate is not None:
+            by_object = self.pos.get(predicate, {})
+            if obj is not None:
+                for s in by_object.get(obj, ()):
+                    yield s, predicate, obj
+            else:
+                for o, subjects in by_object.items():
+                    for s in subjects:
+                        yield s, predicate, o
+        elif obj is not None:
+            for s, predicates in self.osp.get(obj, {}).items():
+                for p in predicates:
+                    yield s, p, obj
+        else:
+            for s, by_predicate in self.spo.items():
+                for p, objects in by_predicate.items():
+                    for o in objects:
+                        yield s, p, o
+
+    def estimate(self, subject=None, predicate=None, obj=None):
+        """Upper bound on the number of triples match() yields for a pattern"""
+        if subject is not None:
+            if predicate is not None:
+                return len(self.spo.get(subject, {}).get(predicate, ()))
+            if obj is not None:
+                return len(self.osp.get(obj, {}).get(subject, ()))
+            return sum(len(objects) for objects in self.spo.get(subject, {}).values())
+        if predicate is not None:
+            if obj is not None:
+                return len(self.pos.get(predicate, {}).get(obj, ()))
+            return self.predicate_sizes.get(predicate, 0)
+        if obj is not None:
+            return sum(len(predicates) for predicates in self.osp.get(obj, {}).values())
+        return self.size
+
+    def solve(self, patterns, binding):
+        """Yield every extension of binding that satisfies all patterns"""
+        if not patterns:
+            yield binding
+            return
+        # Join the most selective pattern first, given what is bound so far
+        resolved = [tuple(binding.get(term) if isinstance(term, Variable) else term for term in pattern)
+                    for pattern in patterns]
+        index = min(range(len(patterns)), key=lambda i: self.estimate(*resolved[i]))
+        pattern, rest = patterns[index], patterns[:index] + patterns[index + 1:]
+        for triple in self.match(*resolved[index]):
+            extended = dict(binding)
+            for term, value in zip(pattern, triple):
+                if isinstance(term, Variable) and extended.setdefault(term, value) != value:
+                    break
+            else:
+                yield from self.solve(rest, extended)
+
+    def query(self, query, timeout=None, cache=True):
+        """Run a SELECT query and return an application/sparql-results+json document
+
+        cache is accepted for compatibility with SparqlClient; nothing is cached here.
+        """
+        try:
+            variables, distinct, patterns, values, limit = parse_select(query)
+        except ValueError as e:
+            raise SparqlError(f"Unsupported SPARQL query: {e}") from e
+        if variables is None:
+            terms = [name for row in values[:1] for name, _ in row]
+            terms += [term for pattern in patterns for term in pattern if isinstance(term, Variable)]
+            variables = list(dict.fromkeys(terms))
+        rows, seen = [], set()
+        solutions = (binding for row in (((),) if values is None else values) for binding in self.solve(patterns, dict(row)))
+        for binding in solutions:
+            row = tuple(binding.get(variable) for variable in variables)
+            if distinct:
+                if row in seen:
+                    continue
+                seen.add(row)
+            rows.append({variable: term_json(value) for variable, value in zip(variables, row) if value is not None})
+            if limit is not None and len(rows) >= limit:
+                break
+        return {'head': {'vars': list(variables)}, 'results': {'bindings': rows}}
+
+    def close(self):
+        pass
+
+@functools.lru_cache(maxsize=1024)
+def parse_select(query):
+    """Split a SELECT query into (variables or None for *, distinct, triple patterns, VALUES rows, limit)
+
+    Parsed queries are cached: the app asks the same few query shapes over and over.
+    """
+    reader = RdfReader(query)
+    while reader.accept('PREFIX'):
+        reader.prefix()
+    reader.expect('SELECT')
+    distinct = reader.accept('DISTINCT')
+    if reader.accept('*'):
+        variables = None
+    else:
+        variables = []
+        while reader.peek() and reader.peek()[0] in '?$':
+            variables.append(reader.term(variables=True))
+        if not variables:
+            raise ValueError("SELECT needs variables or *")
+    reader.accept('WHERE')
+    reader.expect('{')
+    patterns, values = [], None
+    while not reader.accept('}'):
+        if reader.accept('VALUES'):
+            if values is not None:
+                raise ValueError("Only one VALUES block is supported")
+            values = read_values(reader)
+        else:
+            patterns.extend(reader.triples(variables=True))
+        reader.accept('.')
+    limit = None
+    if reader.accept('LIMIT'):
+        kind, match = reader.next()
+        if kind != 'number' or not match.group().isdigit():
+            raise ValueError(f"Expected a row count after LIMIT, found {match.group()!r}")
+        limit = int(match.group())
+    if reader.peek() is not None:
+        raise ValueError(f"Unexpected {reader.peek()!r} after the query")
+    return variables and tuple(variables), distinct, tuple(patterns), values, limit
+
+def read_values(reader):
+    """Read the rest of a VALUES block as a tuple of rows of (variable, term) pairs"""
+    grouped = reader.accept('(')
+    names = []
+    while True:
+        name = reader.term(variables=True)
+        if not isinstance(name, Variable):
+            raise ValueError(f"Expected a variable after VALUES, found {name!r}")
+        names.append(name)
+        if not grouped or reader.accept(')'):
+            break
+    reader.expect('{')
+    rows = []
+    while not reader.accept('}'):
+        if grouped:
+            reader.expect('(')
+        rows.append(tuple((name, reader.term()) for name in names))
+        if grouped:
+            reader.expect(')')
+    return tuple(rows)
+
+def term_json(term):
+    """A term as an application/sparql-results+json value"""
+    if isinstance(term, Literal):
+        value = {'type': 'literal', 'value': term.value}
+        if term.lang:
+            value['xml:lang'] = term.lang
+        elif term.datatype:
+            value['datatype'] = term.datatype
+        return value
+    return {'type': 'uri', 'value': term}
+
+def create_knowledge_base():
+    """The query backend selected by KNOWLEDGE_BACKEND"""
+    backend = app.config['KNOWLEDGE_BACKEND']
+    if backend == 'embedded':
+        return EmbeddedStore.load(app.config['RDF_DATA'])
+    if backend == 'fuseki':
+        return SparqlClient(
+            app.config['SPARQL_ENDPOINT'],
+            timeout=app.config['SPARQL_TIMEOUT'],
+            pool_size=app.config['SPARQL_POOL_SIZE'],
+            cache=ResultCache(app.config['SPARQL_CACHE_SIZE'], app.config['SPARQL_CACHE_TTL'])
+        )
+    raise ValueError(f"Unknown KNOWLEDGE_BACKEND {backend!r}; expected 'fuseki' or 'embedded'")
+
+sparql = create_knowledge_base()
+
+# Gazetteer
+# Store, person and campaign names are read from the knowledge base (every
+# :hasName literal, plus first and last names of people) into a token trie,
+# the way spaCy's PhraseMatcher works: a question is split into case-folded
+# words and each word is one dict step, so matching costs microseconds however
+# many names are known. Refreshes only add and remove the names that changed.
+# The embedded store is re-read when its version changes; Fuseki every
+# GAZETTEER_REFRESH seconds.
+GAZETTEER_WORD = re.compile(r'\w+')
+GazetteerMatch = namedtuple('GazetteerMatch', ['label', 'kind', 'entities', 'start', 'end'])
+GAZETTEER_QUERIES = {
+    'names': """
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX : <http://example.org/FundraisingOntology#>
+        SELECT ?entity ?type ?name WHERE { ?entity rdf:type ?type ; :hasName ?name }
+        """,
+    'people': """
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX : <http://example.org/FundraisingOntology#>
+        SELECT ?entity ?first ?last WHERE { ?entity rdf:type :Person ; :hasFirstName ?first ; :hasLastName ?last }
+        """,
+}
+
+def knowledge_base_names(knowledge_base):
+    """Every (label, kind, entity IRI) the knowledge base names; kind is the local name of the entity's type
+
+    The result cache is bypassed, so a refresh sees names changed since the last one.
+    """
+    entries = set()
+    for binding in knowledge_base.query(GAZETTEER_QUERIES['names'], cache=False)["results"]["bindings"]:
+        kind = re.split(r'[#/]', binding["type"]["value"])[-1]
+        entries.add((binding["name"]["value"], kind, binding["entity"]["value"]))
+    for binding in knowledge_base.query(GAZETTEER_QUERIES['people'], cache=False)["results"]["bindings"]:
+        entries.add((f'{binding["first"]["value"]} {binding["last"]["value"]}', 'Person', binding["entity"]["value"]))
+    return entries
+
+class Gazetteer:
+    """Case-insensitive whole-word matcher for entity names, kept in sync with a knowledge base"""
+
+    END = None  # Trie key holding the (label, kind, entity) entries that end at a node
+
+    def __init__(self, knowledge_base=None, max_age=60):
+        self.knowledge_base = knowledge_base
+        self.max_age = max_age
+        self.root = {}
+        self.entries = set()
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.refreshed_at = None
+        self.version = None
+
+    def add(self, label, kind, entity):
+        words = GAZETTEER_WORD.findall(label.casefold())
+        if not words:
+            return
+        with self.lock:
+            node = self.root
+            for word in words:
+                node = node.setdefault(word, {})
+            node.setdefault(self.END, set()).add((label, kind, entity))
+            self.entries.add((label, kind, entity))
+
+    def remove(self, label, kind, entity):
+        words = GAZETTEER_WORD.findall(label.casefold())
+        with self.lock:
+            path, node = [], self.root
+            for word in words:
+                if word not in node:
+                    return
+                path.append((node, word))
+                node = node[word]
+            node.get(self.END, set()).discard((label, kind, entity))
+            self.entries.discard((label, kind, entity))
+            if not node.get(self.END, True):
+                del node[self.END]
+            # Drop nodes no other name passes through
+            for parent, word in reversed(path):
+                if parent[word]:
+                    break
+                del parent[word]
+
+    def update(self, entries):
+        """Make the gazetteer hold exactly entries, touching only the ones that changed"""
+        entries = set(entries)
+        for entry in self.entries - entries:
+            self.remove(*entry)
+        for entry in entries - self.entries:
+            self.add(*entry)
+
+    def stale(self):
+        """Whether the names may be out of date: never loaded, a new store version, or older than max_age"""
+        if self.refreshed_at is None:
+            return True
+        version = getattr(self.knowledge_base, 'version', None)
+        if version is not None:
+            return version != self.version
+        return time.monotonic() - self.refreshed_at >= self.max_age
+
+    def refresh_if_stale(self):
+        """Re-read the knowledge base's names if they may have changed
+
+        Until a load has succeeded every caller waits for it, and a failed
+        load raises SparqlError. Later refreshes run in one thread while the
+        others keep matching against the names already loaded; a failed
+        refresh is logged and tried again on the next call.
+        """
+        if self.knowledge_base is None or not self.stale():
+            return
+        if not self.refresh_lock.acquire(blocking=self.refreshed_at is None):
+            return
+        try:
+            if not self.stale():
+                return  # Another thread refreshed while this one waited
+            version, started = getattr(self.knowledge_base, 'version', None), time.monotonic()
+            self.update(knowledge_base_names(self.knowledge_base))
+            self.refreshed_at, self.version = started, version
+        except SparqlError as e:
+            if self.refreshed_at is None:
+                raise
+            app.logger.warning("Gazetteer not refreshed: %s", e)
+        finally:
+            self.refresh_lock.release()
+
+    def match(self, text, kind=None):
+        """Longest non-overlapping name matches in text, left to right, optionally of one kind only"""
+        self.refresh_if_stale()
+        words = [(match.group().casefold(), match.start(), match.end()) for match in GAZETTEER_WORD.finditer(text)]
+        matches = []
+        with self.lock:
+            position = 0
+            while position < len(words):
+                node, found = self.root, None
+                for index in range(position, len(words)):
+                    node = node.get(words[index][0])
+                    if node is None:
+                        break
+                    entries = [entry for entry in node.get(self.END, ()) if kind is None or entry[1] == kind]
+                    if entries:
+                        found = index, entries
+                if found is None:
+                    position += 1
+                    continue
+                index, entries = found
+                label = min(entry[0] for entry in entries)
+                matches.append(GazetteerMatch(label, entries[0][1], sorted(entry[2] for entry in entries if entry[0] == label),
+                                              words[position][1], words[index][2]))
+                position = index + 1
+        return matches
+
+gazetteer = Gazetteer(sparql, app.config['GAZETTEER_REFRESH'])
+
+def sparql_literal(text):
+    """Quote text as a SPARQL string literal"""
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r') + '"'
+
+def owned_store_name(question, doc=None):
+    """The store an ownership question asks about, or None
+
+    Store names come from the gazetteer (the longest known name in the
+    question) or, with ENTITY_MATCHER = 'ner' or when a spaCy doc is
+    passed, from the last entity spaCy found. Raises SparqlError when the
+    gazetteer's names have never been loaded and cannot be.
+    """
+    if "owns" not in question.lower():
+        return None
     store_name = None
-    for ent in doc.ents:  # Extract entities (e.g., store names)
-        store_name = ent.text
-    
-    if "owns" in question.lower() and store_name:
-        query = f"""
+    if doc is None and app.config['ENTITY_MATCHER'] == 'gazetteer':
+        matches = gazetteer.match(question, kind='Store')
+        if matches:
+            store_name = max(matches, key=lambda match: match.end - match.start).label
+    else:
+        for ent in (doc if doc is not None else nlp(question)).ents:  # Extract entities (e.g., store names)
+            store_name = ent.text
+    return store_name
+
+def owner_query(store_name):
+    """SPARQL for the owner of the store with the given name"""
+    return f"""
         PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-        PREFIX : <http://example.org/ontology#>
+        PREFIX : <http://example.org/FundraisingOntology#>
         SELECT ?owner WHERE {{
             ?store rdf:type :Store .
-            ?store :hasName "{store_name}" .
+            ?store :hasName {sparql_literal(store_name)} .
             ?store :hasOwner ?owner .
         }}
         """
-        return query
+
+def generate_sparql_query(question, doc=None):
+    store_name = owned_store_name(question, doc)
+    if store_name:
+        return owner_query(store_name)
     return None
 
+def generate_owners_query(store_names):
+    """One query for the owners of several stores, the names bound with VALUES"""
+    values = " ".join(sparql_literal(name) for name in store_names)
+    return f"""
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX : <http://example.org/FundraisingOntology#>
+        SELECT ?name ?owner WHERE {{
+            VALUES ?name {{ {values} }}
+            ?store rdf:type :Store .
+            ?store :hasName ?name .
+            ?store :hasOwner ?owner .
+        }}
+        """
+
+def answer_question(question, knowledge_base=None):
+    """Return (answer, generated query) for a question, asking the configured backend by default"""
+    knowledge_base = knowledge_base or sparql
+    try:
+        query = generate_sparql_query(question)
+    except SparqlError as e:
+        app.logger.warning("%s", e)
+        return "The knowledge base is unavailable right now.", None
+    if not query:
+        return "Could not understand the question.", None
+    try:
+        bindings = knowledge_base.query(query)["results"]["bindings"]
+    except SparqlError as e:
+        app.logger.warning("%s", e)
+        return "The knowledge base is unavailable right now.", query
+    if bindings:
+        return bindings[0]["owner"]["value"], query
+    return "No results found.", query
+
+# Batch questions
+# With the NER matcher a batch goes through spaCy in one nlp.pipe pass. The
+# stores it asks about are then looked up either with one VALUES query for the
+# whole batch or with one query per distinct store run in parallel; each store
+# is asked once however many questions mention it.
+def answer_questions(questions, mode=None, knowledge_base=None):
+    """Answer a list of questions; returns one {question, answer, query} dict per question"""
+    knowledge_base = knowledge_base or sparql
+    mode = mode or app.config['BATCH_QUERY_MODE']
+    if app.config['ENTITY_MATCHER'] == 'gazetteer':
+        try:
+            store_names = [owned_store_name(question) for question in questions]
+        except SparqlError as e:
+            app.logger.warning("%s", e)
+            return [{"question": question, "answer": "The knowledge base is unavailable right now.", "query": None}
+                    for question in questions]
+    else:
+        docs = nlp.pipe(questions, batch_size=app.config['NLP_BATCH_SIZE'], n_process=app.config['NLP_PROCESSES'])
+        store_names = [owned_store_name(question, doc) for question, doc in zip(questions, docs)]
+    distinct_names = list(dict.fromkeys(name for name in store_names if name))
+
+    owners, failed = {}, set()
+    if distinct_names and mode == 'values':
+        try:
+            bindings = knowledge_base.query(generate_owners_query(distinct_names))["results"]["bindings"]
+        except SparqlError as e:
+            app.logger.warning("%s", e)
+            failed.update(distinct_names)
+        else:
+            for binding in bindings:
+                owners.setdefault(binding["name"]["value"], binding["owner"]["value"])
+    elif distinct_names:
+        with ThreadPoolExecutor(max_workers=app.config['BATCH_QUERY_THREADS']) as pool:
+            futures = {name: pool.submit(knowledge_base.query, owner_query(name)) for name in distinct_names}
+        for name, future in futures.items():
+            try:
+                bindings = future.result()["results"]["bindings"]
+            except SparqlError as e:
+                app.logger.warning("%s", e)
+                failed.add(name)
+            else:
+                if bindings:
+                    owners[name] = bindings[0]["owner"]["value"]
+
+    answers = []
+    for question, name in zip(questions, store_names):
+        if name is None:
+            answer = "Could not understand the question."
+        elif name in owners:
+            answer = owners[name]
+        elif name in failed:
+            answer = "The knowledge base is unavailable right now."
+        else:
+            answer = "No results found."
+        answers.append({"question": question, "answer": answer, "query": owner_query(name) if name else None})
+    return answers
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     answer = None
     query = None
     if request.method == "POST":
-        question = request.form["question"]
-        query = generate_sparql_query(question)
-        if query:
-            sparql.setQuery(query)
-            results = sparql.query().convert()
-            bindings = results["results"]["bindings"]
-            if bindings:
-                answer = bindings[0]["owner"]["value"]
-            else:
-                answer = "No results found."
-        else:
-            answer = "Could not understand the question."
+        answer, query = answer_question(request.form["question"])
     return render_template("index.html", answer=answer, query=query)
 
+@app.route("/api/questions", methods=["POST"])
+def questions_api():
+    """Answer a JSON list of questions in one batch"""
+    data = request.get_json(silent=True) or {}
+    questions = data.get("questions")
+    mode = data.get("mode", app.config['BATCH_QUERY_MODE'])
+    if not isinstance(questions, list) or not all(isinstance(question, str) for question in questions):
+        return jsonify({"success": False, "error": "questions must be a list of strings"})
+    if len(questions) > app.config['BATCH_MAX_QUESTIONS']:
+        return jsonify({"success": False, "error": f"At most {app.config['BATCH_MAX_QUESTIONS']} questions per request"})
+    if mode not in ("values", "concurrent"):
+        return jsonify({"success": False, "error": "mode must be 'values' or 'concurrent'"})
+    return jsonify({"success": True, "mode": mode, "answers": answer_questions(questions, mode)})
+
 if __name__ == "__main__":
+    if app.config['ENTITY_MATCHER'] == 'ner':
+        print(f"spaCy pipeline ready in {nlp.warm_up():.2f}s")
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Grok Test App
+
+questions: asks "Who owns <store>?" for every store in appData/testData.ttl,
+round robin, and reports question latency per knowledge backend. Fuseki must
+be running at --endpoint with the same data loaded.
+
+startup: starts a fresh interpreter per spaCy pipeline configuration, forks
+--workers workers from it, and reports import time, pipeline warm-up, question
+latency and per-worker memory, with the pipeline loaded in each worker or
+preloaded before the fork. Needs spaCy, the model, and Linux for
+/proc/self/smaps_rollup.
+
+gazetteer: builds a gazetteer of --names generated store names and reports
+build time, match latency and the cost of an incremental refresh.
+
+    python benchmark.py questions --backends embedded
+    python benchmark.py questions --backends fuseki,fuseki-cached,embedded --questions 2000
+    python benchmark.py startup --workers 4
+    python benchmark.py gazetteer --names 50000
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from app import (app, answer_question, generate_sparql_query, gazetteer, EmbeddedStore,
+                 Gazetteer, ResultCache, SparqlClient, IRI)
+
+ONTOLOGY = "http://example.org/FundraisingOntology#"
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def create_backend(name, args):
+    if name == "embedded":
+        return EmbeddedStore.load(app.config["RDF_DATA"])
+    cache = ResultCache(app.config["SPARQL_CACHE_SIZE"], app.config["SPARQL_CACHE_TTL"]) if name == "fuseki-cached" else None
+    return SparqlClient(args.endpoint, timeout=app.config["SPARQL_TIMEOUT"], pool_size=1, cache=cache)
+
+
+def store_names():
+    store = EmbeddedStore.load(app.config["RDF_DATA"])
+    return sorted(name.value for _, _, name in store.match(None, IRI(ONTOLOGY + "hasName"), None))
+
+
+def bench_questions(args):
+    app.config["ENTITY_MATCHER"] = args.matcher
+    # Names come from the data file whatever backend is measured, so matching costs the same for each
+    gazetteer.knowledge_base = EmbeddedStore.load(app.config["RDF_DATA"])
+    questions = [f"Who owns {name}?" for name in store_names()]
+    print(f"🧪 {args.questions} questions over {len(questions)} stores, {args.matcher} matcher")
+    print(f"{'backend':<15} {'startup ms':>10} {'mean us':>9} {'p50 us':>8} {'p95 us':>8} {'p99 us':>8} {'query us':>9}")
+
+    ok = True
+    for name in args.backends.split(","):
+        started = time.perf_counter()
+        backend = create_backend(name, args)
+        startup = time.perf_counter() - started
+
+        answer, _ = answer_question(questions[0], backend)
+        if answer.startswith(("No results", "The knowledge base")):
+            print(f"{name:<15} ❌ {answer}")
+            ok = False
+            continue
+
+        latencies, query_latencies = [], []
+        for index in range(args.questions):
+            question = questions[index % len(questions)]
+            started = time.perf_counter()
+            answer_question(question, backend)
+            latencies.append(time.perf_counter() - started)
+
+            query = generate_sparql_query(question)
+            started = time.perf_counter()
+            backend.query(query)
+            query_latencies.append(time.perf_counter() - started)
+        backend.close()
+
+        latencies.sort()
+        print(f"{name:<15} {startup * 1e3:>10.1f} {sum(latencies) / len(latencies) * 1e6:>9.0f} "
+              f"{percentile(latencies, 0.5) * 1e6:>8.0f} {percentile(latencies, 0.95) * 1e6:>8.0f} "
+              f"{percentile(latencies, 0.99) * 1e6:>8.0f} {sum(query_latencies) / len(query_latencies) * 1e6:>9.0f}")
+    print("\n'query us' is the backend alone; the other columns include generating the query from the question.")
+    return ok
+
+
+# Runs in a fresh interpreter so the import and model load are measured cold
+STARTUP_PROBE = """
+import json, os, sys, time
+
+workers, preload, questions = int(sys.argv[1]), sys.argv[2] == "1", int(sys.argv[3])
+
+def memory():
+    fields = {}
+    with open("/proc/self/smaps_rollup") as handle:
+        for line in handle:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return fields["Rss"], fields["Private_Clean"] + fields["Private_Dirty"]
+
+def ask(app):
+    started = time.perf_counter()
+    for _ in range(questions):
+        app.generate_sparql_query("Who owns FuelStop?")
+    return (time.perf_counter() - started) / questions * 1e6
+
+started = time.perf_counter()
+import app
+import_s = time.perf_counter() - started
+warm_up_s = None
+if preload:
+    warm_up_s = app.nlp.warm_up()
+    import gc
+    gc.freeze()
+
+children = []
+for _ in range(workers):
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read)
+        report = {"warm_up_s": app.nlp.warm_up() if not preload else warm_up_s}
+        report["question_us"] = ask(app)
+        report["rss_mb"], report["private_mb"] = memory()
+        os.write(write, json.dumps(report).encode())
+        os._exit(0)
+    os.close(write)
+    children.append((pid, read))
+
+reports = []
+for pid, read in children:
+    with os.fdopen(read) as handle:
+        reports.append(json.loads(handle.read()))
+    os.waitpid(pid, 0)
+mean = lambda key: sum(report[key] for report in reports) / len(reports)
+print(json.dumps({"import_s": import_s, "warm_up_s": mean("warm_up_s"), "question_us": mean("question_us"),
+                  "rss_mb": mean("rss_mb"), "private_mb": mean("private_mb")}))
+"""
+
+
+def bench_startup(args):
+    configurations = {"full": "", "ner-only": app.config["SPACY_EXCLUDE"]}
+    print(f"🧪 spaCy {app.config['SPACY_MODEL']} startup, {args.workers} workers")
+    print(f"{'pipeline':<10} {'load':<10} {'import ms':>9} {'warm-up s':>9} {'question us':>11} "
+          f"{'worker RSS MB':>13} {'private MB':>10}")
+
+    results = {}
+    for name, exclude in configurations.items():
+        for preload in (False, True):
+            env = dict(os.environ, SPACY_EXCLUDE=exclude, NLP_PRELOAD="0", ENTITY_MATCHER="ner")
+            completed = subprocess.run(
+                [sys.executable, "-c", STARTUP_PROBE, str(args.workers), "1" if preload else "0", str(args.questions)],
+                cwd=os.path.dirname(os.path.abspath(__file__)), env=env, capture_output=True, text=True
+            )
+            if completed.returncode != 0:
+                print(f"{name:<10} ❌ {completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else completed.returncode}")
+                return False
+            result = results[name, preload] = json.loads(completed.stdout.strip().splitlines()[-1])
+            print(f"{name:<10} {'preload' if preload else 'per-worker':<10} {result['import_s'] * 1e3:>9.0f} "
+                  f"{result['warm_up_s']:>9.2f} {result['question_us']:>11.0f} {result['rss_mb']:>13.0f} "
+                  f"{result['private_mb']:>10.0f}")
+
+    full, ner = results["full", False], results["ner-only", True]
+    print()
+    print(f"Cold start {full['import_s'] + full['warm_up_s']:.2f}s → {ner['import_s'] + ner['warm_up_s']:.2f}s, "
+          f"private memory per worker {full['private_mb']:.0f} MB → {ner['private_mb']:.0f} MB "
+          f"(full pipeline per worker vs NER-only preloaded)")
+    return True
+
+
+STORE_WORDS = ["Quick", "Mart", "Fuel", "Stop", "Food", "Basket", "Corner", "Shop", "Express", "Market",
+               "Fresh", "Daily", "City", "Star", "Sun", "Valley", "Green", "Family", "Super", "Saver"]
+
+
+def bench_gazetteer(args):
+    rng = random.Random(args.seed)
+    entries = {(" ".join(rng.choice(STORE_WORDS) for _ in range(rng.randint(1, 3))) + f" {index}", "Store",
+                f"http://example.org/FundraisingOntology#Store{index}") for index in range(args.names)}
+    print(f"🧪 Gazetteer of {args.names:,} store names")
+
+    matcher = Gazetteer()
+    started = time.perf_counter()
+    matcher.update(entries)
+    print(f"Built in {(time.perf_counter() - started) * 1e3:.0f} ms")
+
+    labels = sorted(entry[0] for entry in entries)
+    questions = [f"Who owns {rng.choice(labels)} these days?" for _ in range(args.questions)]
+    latencies = []
+    for question in questions:
+        started = time.perf_counter()
+        matcher.match(question, kind="Store")
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    print(f"Match: mean {sum(latencies) / len(latencies) * 1e6:.1f} us, p50 {percentile(latencies, 0.5) * 1e6:.1f} us, "
+          f"p99 {percentile(latencies, 0.99) * 1e6:.1f} us")
+
+    changed = set(list(entries)[args.changes:]) | {(f"New Store {index}", "Store", f"new:{index}") for index in range(args.changes)}
+    started = time.perf_counter()
+    matcher.update(changed)
+    print(f"Refresh with {args.changes} names removed and {args.changes} added: {(time.perf_counter() - started) * 1e3:.1f} ms")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="scenario", required=True)
+
+    questions = subparsers.add_parser("questions", help="question latency per knowledge backend")
+    questions.add_argument("--backends", default="fuseki,fuseki-cached,embedded",
+                           help="comma-separated: fuseki (no cache), fuseki-cached, embedded")
+    questions.add_argument("--questions", type=int, default=1000)
+    questions.add_argument("--endpoint", default=app.config["SPARQL_ENDPOINT"])
+    questions.add_argument("--matcher", choices=("gazetteer", "ner"), default=app.config["ENTITY_MATCHER"])
+    questions.set_defaults(run=bench_questions)
+
+    startup = subparsers.add_parser("startup", help="cold start and per-worker memory, full vs NER-only pipeline")
+    startup.add_argument("--workers", type=int, default=2)
+    startup.add_argument("--questions", type=int, default=200, help="questions per worker")
+    startup.set_defaults(run=bench_startup)
+
+    gazetteer_bench = subparsers.add_parser("gazetteer", help="gazetteer build, match and refresh cost at scale")
+    gazetteer_bench.add_argument("--names", type=int, default=50000)
+    gazetteer_bench.add_argument("--questions", type=int, default=10000)
+    gazetteer_bench.add_argument("--changes", type=int, default=100, help="names removed and added by the refresh")
+    gazetteer_bench.add_argument("--seed", type=int, default=0)
+    gazetteer_bench.set_defaults(run=bench_gazetteer)
+
+    args = parser.parse_args()
+    sys.exit(0 if args.run(args) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Checks for the Grok Test App SPARQL client
+
+Runs SparqlClient against a local stand-in for Fuseki: a threaded HTTP/1.1
+server that answers every query with a fixed result set and records which
+connection each query arrived on. Covers keep-alive connection reuse, the
+retry after the server drops idle connections, query timeouts, cache TTL
+expiry and bypass, and that queries reach the endpoint exactly as written.
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from app import ResultCache, SparqlClient, SparqlError
+
+RESULTS = {"head": {"vars": ["owner"]}, "results": {"bindings": [{"owner": {"type": "literal", "value": "Alice"}}]}}
+
+OWNER_QUERY = """PREFIX : <http://example.org/FundraisingOntology#>
+# owner lookup
+SELECT ?owner WHERE { ?store :hasName "QuickMart" ; :ownedBy ?owner . }"""
+
+
+class StandInFuseki(BaseHTTPRequestHandler):
+    """Answers POSTed SPARQL queries; "slow" queries stall, "drop" queries close the connection after answering"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        query = parse_qs(self.rfile.read(length).decode())["query"][0]
+        self.server.received.append((self.client_address, query))
+        if "slow" in query:
+            time.sleep(0.5)
+        payload = json.dumps(RESULTS).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/sparql-results+json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        # Keep-alive was promised, so the client pools the connection and finds it closed on next use
+        self.close_connection = "drop" in query
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # The timeout check hangs up before the slow answer is written
+
+
+def start_server():
+    server = StandInServer(("127.0.0.1", 0), StandInFuseki)
+    server.received = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def connections(server):
+    """Number of distinct client connections the server has seen"""
+    return len({address for address, _ in server.received})
+
+
+def check_connection_reuse(server, client):
+    for _ in range(5):
+        client.query(OWNER_QUERY)
+    return len(server.received) == 5 and connections(server) == 1, f"{connections(server)} connection(s) for 5 queries"
+
+
+def check_stale_connection_retry(server, client):
+    client.query(OWNER_QUERY + " # drop")
+    results = client.query(OWNER_QUERY)
+    return results == RESULTS and connections(server) == 2, f"{connections(server)} connection(s), retried once"
+
+
+def check_all_pooled_connections_stale(server, client):
+    # Two pooled connections, both closed by the server while idle
+    barrier = threading.Barrier(2)
+
+    def query():
+        barrier.wait()
+        client.query(OWNER_QUERY + " # drop slow")
+
+    threads = [threading.Thread(target=query) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pooled = client.pool.qsize()
+    results = client.query(OWNER_QUERY)
+    return pooled == 2 and results == RESULTS, f"{pooled} stale pooled connection(s), query answered on a new one"
+
+
+def check_timeout(server, client):
+    started = time.perf_counter()
+    try:
+        client.query(OWNER_QUERY + " # slow", timeout=0.1)
+    except SparqlError:
+        elapsed = time.perf_counter() - started
+        return elapsed < 0.4, f"gave up after {elapsed:.2f}s"
+    return False, "no SparqlError"
+
+
+def check_cache_ttl(server, client):
+    client.cache = ResultCache(16, 0.2)
+    client.query(OWNER_QUERY)
+    client.query("  " + OWNER_QUERY.replace(" ; ", " ;\n    "))  # Same query, different whitespace
+    cached = len(server.received)
+    time.sleep(0.25)
+    client.query(OWNER_QUERY)
+    return (cached, len(server.received)) == (1, 2), f"{cached} request(s) before expiry, {len(server.received)} after"
+
+
+def check_cache_bypass(server, client):
+    client.cache = ResultCache(16, 300)
+    client.query(OWNER_QUERY)
+    client.query(OWNER_QUERY, cache=False)
+    client.query(OWNER_QUERY)
+    return len(server.received) == 2, f"{len(server.received)} request(s) for a cached, an uncached and a cached query"
+
+
+def check_query_sent_as_written(server, client):
+    client.query(OWNER_QUERY)
+    return server.received[-1][1] == OWNER_QUERY, "comment and line breaks preserved"
+
+
+CHECKS = {
+    "pooled connection reuse": check_connection_reuse,
+    "stale connection retry": check_stale_connection_retry,
+    "retry with every pooled connection stale": check_all_pooled_connections_stale,
+    "query timeout": check_timeout,
+    "cache TTL expiry": check_cache_ttl,
+    "cache bypass": check_cache_bypass,
+    "query sent as written": check_query_sent_as_written,
+}
+
+
+def main():
+    """Run every SPARQL client check against a fresh stand-in server"""
+    print("🧪 Checking the SPARQL client against a stand-in Fuseki")
+    print("=" * 50)
+
+    failures = 0
+    for name, check in CHECKS.items():
+        server = start_server()
+        client = SparqlClient(f"http://127.0.0.1:{server.server_address[1]}/ds/query", timeout=2.0, pool_size=2)
+        try:
+            passed, detail = check(server, client)
+        except Exception as e:
+            passed, detail = False, f"{type(e).__name__}: {e}"
+        finally:
+            client.close()
+            server.shutdown()
+            server.server_close()
+        print(f"{'✅' if passed else '❌'} {name}: {detail}")
+        failures += not passed
+
+    print()
+    print("🎉 The SPARQL client passed every check!" if not failures else f"{failures} check(s) failed")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -1,86 +1,73 @@
-from flask import Flask, render_template, request, abort, jsonify, redirect, url_for, flash
+from flask import Flask, render_template, request, abort, jsonify, redirect, url_for, flash, g, has_request_context, stream_with_context
+from flask import before_render_template, template_rendered
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, event, func, insert, literal_column, or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.orm import column_property, joinedload
+from sqlalchemy.exc import OperationalError
+import click
+import csv
+import io
 import os
+from collections import defaultdict, deque, namedtuple
 from datetime import datetime, timedelta, date
 import json
+import math
+import random
 import sqlite3
+import tempfile
+import threading
+import time
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///holistic_retail.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///holistic_retail.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.secret_key = 'your-secret-key-here'  # Required for flash messages
+app.config['MAX_BATCH_SCAN'] = 1000  # Largest barcode list accepted by /api/inventory/scan/batch
+app.config['FIXTURE_BATCH_SIZE'] = 10000  # Rows per executemany when loading fixtures
+app.config['IMPORT_CHUNK_SIZE'] = 5000  # Rows per commit when importing an inventory CSV
+app.config['PAGE_SIZE'] = 50  # Default rows per page on list pages
+app.config['MAX_PAGE_SIZE'] = 500  # Largest ?limit= a list page accepts
+app.config['EXPORT_BATCH_SIZE'] = 2000  # Rows fetched from the cursor per chunk of an export download
+app.config['DAILY_OVERTIME_HOURS'] = 8  # Hours in a day after which time counts as overtime
+app.config['WEEKLY_OVERTIME_HOURS'] = 40  # Regular hours in a week after which time counts as overtime
+app.config['TIMESHEET_WEEKS'] = 4  # Weeks the timesheet page reports on by default
+app.config['OVERTIME_PAY_RATE'] = 1.5  # Multiple of the hourly rate paid for overtime hours
+app.config['PERF_INSTRUMENTATION'] = os.environ.get('PERF_INSTRUMENTATION') == '1'  # Per-request SQL/render timing, off by default
+app.config['PERF_WINDOW'] = 500  # Requests kept per endpoint for /debug/perf percentiles
+app.config['PERF_SLOW_STATEMENTS'] = 5  # Slowest statements kept per request
+app.config['SQLITE_BUSY_RETRIES'] = 5  # Extra attempts when a write hits "database is locked"
+app.config['SQLITE_BUSY_BACKOFF'] = 0.02  # Base delay in seconds, doubled on every retry
+app.config['BARCODE_INDEX_SYNC_INTERVAL'] = 1  # Seconds between checks of the inventory change log for writes by other processes
+
+# SQLite production profile, applied to every new connection (set SQLITE_PROFILE=0 to disable)
+app.config['SQLITE_PROFILE_ENABLED'] = os.environ.get('SQLITE_PROFILE', '1') != '0'
+app.config['SQLITE_PRAGMAS'] = {
+    'journal_mode': 'WAL',        # Readers no longer block on the writer
+    'synchronous': 'NORMAL',      # Safe with WAL, fsync only at checkpoints
+    'busy_timeout': 5000,         # Milliseconds to wait on a locked database
+    'mmap_size': 268435456,       # 256 MB memory-mapped reads
+    'cache_size': -65536,         # 64 MB page cache (negative = KiB)
+    'temp_store': 'MEMORY',
+}
 
 db = SQLAlchemy(app)
 
-def check_and_fix_database_schema():
-    """Check if database schema matches current models and fix if needed"""
-    try:
-        # Check if supplier table has email and phone columns
-        with sqlite3.connect('instance/holistic_retail.db') as conn:
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA table_info(supplier)")
-            columns = [column[1] for column in cursor.fetchall()]
-
-            if 'email' not in columns or 'phone' not in columns:
-                print("Database schema mismatch detected. Recreating database...")
-                return False
-        return True
-    except sqlite3.OperationalError as e:
-        if "database is locked" in str(e).lower():
-            print("Database is currently in use. Continuing with existing database.")
-            return True  # Continue with existing DB
-        elif "no such table" in str(e).lower():
-            print("Database table missing. Recreating database...")
-            return False
-        else:
-            print(f"Database operational error: {e}")
-            return False
-    except Exception as e:
-        print(f"Error checking database schema: {e}")
-        return False
-
-def recreate_database():
-    """Drop all tables and recreate them with current schema"""
-    try:
-        with app.app_context():
-            print("Dropping all existing tables...")
-            db.drop_all()
-            print("Creating new database with current schema...")
-            db.create_all()
-            return True
-    except Exception as e:
-        print(f"Error recreating database: {e}")
-        return False
-
-def add_missing_columns():
-    """Try to add missing columns to existing tables"""
-    try:
-        with sqlite3.connect('instance/holistic_retail.db') as conn:
-            cursor = conn.cursor()
-
-            # Check if email column exists in supplier table
-            cursor.execute("PRAGMA table_info(supplier)")
-            columns = [column[1] for column in cursor.fetchall()]
-
-            if 'email' not in columns:
-                print("Adding email column to supplier table...")
-                cursor.execute("ALTER TABLE supplier ADD COLUMN email VARCHAR(120)")
-
-            if 'phone' not in columns:
-                print("Adding phone column to supplier table...")
-                cursor.execute("ALTER TABLE supplier ADD COLUMN phone VARCHAR(20)")
-
-            conn.commit()
-            print("Missing columns added successfully!")
-            return True
-    except Exception as e:
-        print(f"Error adding missing columns: {e}")
-        return False
+@event.listens_for(Engine, 'connect')
+def apply_sqlite_profile(dbapi_connection, connection_record):
+    """Set the configured PRAGMAs on each new SQLite connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection) or not app.config['SQLITE_PROFILE_ENABLED']:
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma, value in app.config['SQLITE_PRAGMAS'].items():
+        cursor.execute(f"PRAGMA {pragma} = {value}")
+    cursor.close()
 
 # Models
 class Supplier(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(120), nullable=False)
+    name = db.Column(db.String(120), nullable=False, index=True)
     contact_info = db.Column(db.String(200))
     email = db.Column(db.String(120))
     phone = db.Column(db.String(20))
@@ -100,6 +87,25 @@ class Inventory(db.Model):
     unit_of_measure = db.Column(db.String(20))
     min_stock_level = db.Column(db.Integer, default=0)
     image_url = db.Column(db.String(200))
+    # Out-of-stock counts seek on quantity; the margin list pages by name, price or cost
+    __table_args__ = (
+        db.Index('ix_inventory_quantity_min_stock', 'quantity', 'min_stock_level'),
+        db.Index('ix_inventory_name', 'name'),
+        db.Index('ix_inventory_price', 'price'),
+        db.Index('ix_inventory_cost_price', 'cost_price'),
+    )
+
+# Low-stock counts compare two columns, which no plain index can seek, so they
+# filter on the difference and an expression index covers it
+inventory_stock_gap = Inventory.quantity - Inventory.min_stock_level
+db.Index('ix_inventory_stock_gap', Inventory.__table__.c.quantity - Inventory.__table__.c.min_stock_level)
+
+# Margin expressions shared by the margin page queries. The expression indexes
+# let SQLite walk SKUs in margin order instead of sorting the whole table.
+inventory_margin_amount = Inventory.price - Inventory.cost_price
+inventory_margin_ratio = (Inventory.price - Inventory.cost_price) / Inventory.price
+db.Index('ix_inventory_margin_ratio', (Inventory.__table__.c.price - Inventory.__table__.c.cost_price) / Inventory.__table__.c.price)
+db.Index('ix_inventory_margin_amount', Inventory.__table__.c.price - Inventory.__table__.c.cost_price)
 
 class Staff(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -127,18 +133,32 @@ class Order(db.Model):
 
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('order.id'))
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), index=True)
     inventory_id = db.Column(db.Integer, db.ForeignKey('inventory.id'))
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
     inventory = db.relationship('Inventory')
 
+# Line count of an order as a correlated subquery, so list pages can show it
+# without loading Order.items. Deferred: only loaded where undefer() asks for it.
+Order.item_count = column_property(
+    select(func.count(OrderItem.id)).where(OrderItem.order_id == Order.id).correlate_except(OrderItem).scalar_subquery(),
+    deferred=True
+)
+
 class Sale(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('order.id'))
     total = db.Column(db.Float, nullable=False)
     date = db.Column(db.DateTime)
     order = db.relationship('Order')
+    __table_args__ = (db.Index('ix_sale_date', 'date'),)
+
+# Sort key of the sales list: undated sales sort after every dated one when
+# descending. The literal (not a bound parameter) lets SQLite match the
+# expression index and walk sales in list order instead of sorting them all.
+sale_sort_date = func.coalesce(Sale.date, literal_column("'0001-01-01 00:00:00.000000'"))
+db.Index('ix_sale_sort_date', func.coalesce(Sale.__table__.c.date, literal_column("'0001-01-01 00:00:00.000000'")))
 
 class Accounting(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -153,13 +173,24 @@ class WorkHour(db.Model):
     date = db.Column(db.Date, nullable=False)
     hours_worked = db.Column(db.Float, nullable=False)
     staff = db.relationship('Staff', backref='work_hours')
+    __table_args__ = (
+        db.Index('ix_work_hour_staff_date', 'staff_id', 'date'),
+        db.Index('ix_work_hour_date', 'date'),
+    )
 
 class Payroll(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     staff_id = db.Column(db.Integer, db.ForeignKey('staff.id'), nullable=False)
     pay_date = db.Column(db.Date, nullable=False)
     amount = db.Column(db.Float, nullable=False)
+    period_start = db.Column(db.Date)  # Set on rows written by a payroll run; NULL for manual entries
+    period_end = db.Column(db.Date)
     staff = db.relationship('Staff', backref='payrolls')
+    __table_args__ = (
+        db.Index('uq_payroll_staff_period', 'staff_id', 'period_start', 'period_end', unique=True),
+        db.Index('ix_payroll_staff_pay_date', 'staff_id', 'pay_date'),
+        db.Index('ix_payroll_pay_date', 'pay_date'),
+    )
 
 class Contract(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -169,6 +200,7 @@ class Contract(db.Model):
     end_date = db.Column(db.Date, nullable=False)
     terms = db.Column(db.Text)
     status = db.Column(db.String(20), default='Active')  # Active, Expired, Terminated
+    __table_args__ = (db.Index('ix_contract_status_end_date', 'status', 'end_date'),)
 
 class PriceList(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -178,6 +210,1236 @@ class PriceList(db.Model):
     effective_date = db.Column(db.Date, nullable=False)
     supplier = db.relationship('Supplier')
     inventory = db.relationship('Inventory')
+    __table_args__ = (db.Index('ix_price_list_inventory_effective_date', 'inventory_id', 'effective_date'),)
+
+# Sales per day, department and staff member, so revenue dashboards read
+# O(days) rows instead of every sale. Department '' holds the order count and
+# any revenue not attributed to an order line; staff_id 0 is "no staff".
+class DailySalesRollup(db.Model):
+    __tablename__ = 'daily_sales_rollup'
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    department = db.Column(db.String(50), nullable=False, default='')
+    staff_id = db.Column(db.Integer, nullable=False, default=0)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    cost = db.Column(db.Float, nullable=False, default=0)
+    __table_args__ = (db.UniqueConstraint('date', 'department', 'staff_id'),)
+
+# Daily sales rollup
+# A trigger folds every inserted sale into daily_sales_rollup in the same
+# statement, so no write path can forget it. A sale's order lines must be
+# written before the sale itself (record_checkout does); lines added later
+# only show up after `flask backfill-sales-rollup`. Undated sales are skipped.
+SALES_ROLLUP_UPSERT = """
+    INSERT INTO daily_sales_rollup (date, department, staff_id, orders, units, revenue, cost)
+    SELECT day, department, staff_id, sum(orders), sum(units), sum(revenue), sum(cost) FROM (
+        SELECT date(sale.date) AS day, coalesce(inventory.department, '') AS department,
+               coalesce("order".staff_id, 0) AS staff_id, 0 AS orders, order_item.quantity AS units,
+               order_item.price * order_item.quantity AS revenue,
+               coalesce(inventory.cost_price, 0) * order_item.quantity AS cost
+        FROM sale
+        JOIN order_item ON order_item.order_id = sale.order_id
+        LEFT JOIN inventory ON inventory.id = order_item.inventory_id
+        LEFT JOIN "order" ON "order".id = sale.order_id
+        WHERE sale.date IS NOT NULL AND {where}
+        UNION ALL
+        SELECT date(sale.date), '', coalesce("order".staff_id, 0), 1, 0,
+               round(sale.total - coalesce((SELECT sum(price * quantity) FROM order_item
+                                            WHERE order_item.order_id = sale.order_id), 0), 2), 0
+        FROM sale
+        LEFT JOIN "order" ON "order".id = sale.order_id
+        WHERE sale.date IS NOT NULL AND {where}
+    )
+    GROUP BY day, department, staff_id
+    ON CONFLICT (date, department, staff_id) DO UPDATE SET
+        orders = orders + excluded.orders,
+        units = units + excluded.units,
+        revenue = revenue + excluded.revenue,
+        cost = cost + excluded.cost
+"""
+
+SALES_ROLLUP_TRIGGER = f"""
+    CREATE TRIGGER IF NOT EXISTS sale_rollup AFTER INSERT ON sale
+    BEGIN
+        {SALES_ROLLUP_UPSERT.format(where='sale.id = NEW.id')};
+    END
+"""
+
+@event.listens_for(db.metadata, 'after_create')
+def create_sales_rollup_trigger(target, connection, **kw):
+    connection.exec_driver_sql(SALES_ROLLUP_TRIGGER)
+
+def rebuild_sales_rollup(connection, since=None):
+    """Recompute the rollup from sales, for every day or for days on or after since"""
+    if since is None:
+        connection.exec_driver_sql("DELETE FROM daily_sales_rollup")
+        connection.exec_driver_sql(SALES_ROLLUP_UPSERT.format(where='1'))
+    else:
+        connection.exec_driver_sql("DELETE FROM daily_sales_rollup WHERE date >= ?", (since.isoformat(),))
+        connection.exec_driver_sql(SALES_ROLLUP_UPSERT.format(where='sale.date >= ?'), (since.isoformat(),) * 2)
+
+@app.cli.command('backfill-sales-rollup')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Only rebuild days on or after this date.')
+def backfill_sales_rollup_command(since):
+    """Rebuild the daily sales rollup from the sales table."""
+    started = time.perf_counter()
+    with db.engine.begin() as connection:
+        rebuild_sales_rollup(connection, since.date() if since else None)
+        days = connection.exec_driver_sql("SELECT count(DISTINCT date) FROM daily_sales_rollup").scalar()
+    print(f"Rolled up {days:,} days of sales in {time.perf_counter() - started:.2f}s.")
+
+# Margin totals per band ('high' >= 30%, 'good' >= 15%, 'low'), so the margin
+# page reads three rows instead of summing every SKU. margin_sum is the sum of
+# (price - cost_price) / price over the band's items.
+class InventoryMarginSummary(db.Model):
+    __tablename__ = 'inventory_margin_summary'
+    band = db.Column(db.String(10), primary_key=True)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    profit = db.Column(db.Float, nullable=False, default=0)
+    margin_sum = db.Column(db.Float, nullable=False, default=0)
+
+# Inventory margin summary
+# Triggers take an item's old price and cost out of its band and add the new
+# ones, on insert, delete and any update of price or cost_price. Quantity
+# updates do not touch the summary. Items without a positive price and cost
+# are left out, as on the margin page.
+MARGIN_SUMMARY_UPSERT = """
+    INSERT INTO inventory_margin_summary (band, item_count, revenue, profit, margin_sum)
+    SELECT CASE WHEN ratio >= 0.30 THEN 'high' WHEN ratio >= 0.15 THEN 'good' ELSE 'low' END AS band,
+           {sign} count(*), {sign} sum(price), {sign} sum(price - cost_price), {sign} sum(ratio)
+    FROM (SELECT price, cost_price, (price - cost_price) / price AS ratio FROM ({items}) WHERE price > 0 AND cost_price > 0)
+    GROUP BY band
+    ON CONFLICT (band) DO UPDATE SET
+        item_count = item_count + excluded.item_count,
+        revenue = revenue + excluded.revenue,
+        profit = profit + excluded.profit,
+        margin_sum = margin_sum + excluded.margin_sum
+"""
+
+def margin_summary_upsert(row, sign):
+    return MARGIN_SUMMARY_UPSERT.format(
+        items=f'SELECT {row}.price AS price, {row}.cost_price AS cost_price', sign=sign
+    )
+
+MARGIN_SUMMARY_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_margin_insert AFTER INSERT ON inventory
+    BEGIN
+        {margin_summary_upsert('NEW', '')};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_margin_delete AFTER DELETE ON inventory
+    BEGIN
+        {margin_summary_upsert('OLD', '-')};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_margin_update AFTER UPDATE OF price, cost_price ON inventory
+    BEGIN
+        {margin_summary_upsert('OLD', '-')};
+        {margin_summary_upsert('NEW', '')};
+    END
+    """,
+]
+
+@event.listens_for(db.metadata, 'after_create')
+def create_margin_summary_triggers(target, connection, **kw):
+    for trigger in MARGIN_SUMMARY_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+
+def rebuild_margin_summary(connection):
+    """Recompute the margin summary from every inventory item"""
+    connection.exec_driver_sql("DELETE FROM inventory_margin_summary")
+    connection.exec_driver_sql(MARGIN_SUMMARY_UPSERT.format(items='SELECT price, cost_price FROM inventory', sign=''))
+
+# Inventory change log
+# One row per inventory item with the sequence number of its latest insert,
+# update or delete. Triggers keep it, so every process sees every other
+# process's writes with a single indexed query (see sync_barcode_index).
+# SQLite has one writer at a time, so sequence numbers follow commit order.
+class InventoryChange(db.Model):
+    __tablename__ = 'inventory_change'
+    item_id = db.Column(db.Integer, primary_key=True)
+    seq = db.Column(db.Integer, nullable=False)
+    __table_args__ = (db.Index('ix_inventory_change_seq', 'seq'),)
+
+INVENTORY_CHANGE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_change_{operation.lower()} AFTER {operation} ON inventory
+    BEGIN
+        INSERT INTO inventory_change (item_id, seq)
+        VALUES ({row}.id, (SELECT coalesce(max(seq), 0) + 1 FROM inventory_change))
+        ON CONFLICT (item_id) DO UPDATE SET seq = excluded.seq;
+    END
+    """
+    for operation, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD'))
+]
+
+@event.listens_for(db.metadata, 'after_create')
+def create_inventory_change_triggers(target, connection, **kw):
+    for trigger in INVENTORY_CHANGE_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+
+# Schema migrations
+# Ordered, idempotent steps tracked in a schema_version table. Pending steps
+# and the version bump run in one transaction; when the stored version is
+# current, startup costs a single SELECT and no schema introspection.
+def column_names(connection, table):
+    return {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+def migrate_create_tables(connection):
+    """Create any model table that does not exist yet"""
+    db.metadata.create_all(bind=connection)
+
+# Columns added to the models after the first databases were created. NOT
+# NULL columns need a default to be added to a table that already has rows.
+LEGACY_COLUMNS = {
+    'supplier': {
+        'email': 'VARCHAR(120)',
+        'phone': 'VARCHAR(20)',
+        'address': 'VARCHAR(200)',
+    },
+    'inventory': {
+        'barcode': 'VARCHAR(50)',
+        'cost_price': 'FLOAT NOT NULL DEFAULT 0',
+        'department': 'VARCHAR(50)',
+        'unit_of_measure': 'VARCHAR(20)',
+        'min_stock_level': 'INTEGER DEFAULT 0',
+        'image_url': 'VARCHAR(200)',
+    },
+}
+
+def migrate_legacy_columns(connection):
+    """Add model columns missing from databases created before they existed"""
+    for table, definitions in LEGACY_COLUMNS.items():
+        columns = column_names(connection, table)
+        for name, definition in definitions.items():
+            if name not in columns:
+                connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                if (table, name) == ('inventory', 'barcode'):
+                    # ADD COLUMN cannot carry UNIQUE; the index gives the same guarantee
+                    connection.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS uq_inventory_barcode ON inventory (barcode)")
+
+def create_model_indexes(connection, model, *names):
+    """CREATE INDEX IF NOT EXISTS for indexes declared on a model"""
+    for index in model.__table__.indexes:
+        if index.name in names:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+
+def migrate_margin_index(connection):
+    """Expression index used to sort the margin page"""
+    create_model_indexes(connection, Inventory, 'ix_inventory_margin_ratio')
+
+def migrate_supplier_name_index(connection):
+    """Suppliers are looked up by name when adding items and loading fixtures"""
+    create_model_indexes(connection, Supplier, 'ix_supplier_name')
+
+def migrate_daily_sales_rollup(connection):
+    """Rollup table and trigger, filled from the sales already recorded"""
+    create_model_indexes(connection, OrderItem, 'ix_order_item_order_id')
+    DailySalesRollup.__table__.create(bind=connection, checkfirst=True)
+    connection.exec_driver_sql(SALES_ROLLUP_TRIGGER)
+    rebuild_sales_rollup(connection)
+
+def migrate_work_hour_index(connection):
+    """Timesheets read a staff member's hours over a date range"""
+    create_model_indexes(connection, WorkHour, 'ix_work_hour_staff_date')
+
+def migrate_payroll_periods(connection):
+    """Pay period columns, unique per staff member, so a payroll run can be repeated safely"""
+    columns = column_names(connection, 'payroll')
+    for name in ('period_start', 'period_end'):
+        if name not in columns:
+            connection.exec_driver_sql(f"ALTER TABLE payroll ADD COLUMN {name} DATE")
+    create_model_indexes(connection, Payroll, 'uq_payroll_staff_period')
+
+def migrate_hot_filter_indexes(connection):
+    """Indexes behind the stock, sales, payroll, price list and contract filters"""
+    create_model_indexes(connection, Inventory, 'ix_inventory_quantity_min_stock')
+    create_model_indexes(connection, Sale, 'ix_sale_date', 'ix_sale_sort_date')
+    create_model_indexes(connection, Payroll, 'ix_payroll_staff_pay_date')
+    create_model_indexes(connection, PriceList, 'ix_price_list_inventory_effective_date')
+    create_model_indexes(connection, Contract, 'ix_contract_status_end_date')
+
+def migrate_list_sort_indexes(connection):
+    """The payroll and timesheet lists page by date across all staff"""
+    create_model_indexes(connection, Payroll, 'ix_payroll_pay_date')
+    create_model_indexes(connection, WorkHour, 'ix_work_hour_date')
+
+def migrate_margin_summary(connection):
+    """Margin summary table and triggers, filled from the current inventory"""
+    InventoryMarginSummary.__table__.create(bind=connection, checkfirst=True)
+    for trigger in MARGIN_SUMMARY_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+    rebuild_margin_summary(connection)
+
+def migrate_margin_list_indexes(connection):
+    """Every margin list sort, and the low-stock count, can seek instead of walking the table"""
+    create_model_indexes(connection, Inventory, 'ix_inventory_name', 'ix_inventory_price', 'ix_inventory_cost_price',
+                         'ix_inventory_margin_amount', 'ix_inventory_stock_gap')
+
+def migrate_inventory_change_log(connection):
+    """Change log and triggers the barcode index follows other processes' writes with"""
+    InventoryChange.__table__.create(bind=connection, checkfirst=True)
+    for trigger in INVENTORY_CHANGE_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+
+MIGRATIONS = [
+    (1, 'Create tables', migrate_create_tables),
+    (2, 'Legacy supplier and inventory columns', migrate_legacy_columns),
+    (3, 'Inventory margin index', migrate_margin_index),
+    (4, 'Supplier name index', migrate_supplier_name_index),
+    (5, 'Daily sales rollup', migrate_daily_sales_rollup),
+    (6, 'Work hour staff/date index', migrate_work_hour_index),
+    (7, 'Payroll run periods', migrate_payroll_periods),
+    (8, 'Hot filter indexes', migrate_hot_filter_indexes),
+    (9, 'List page sort indexes', migrate_list_sort_indexes),
+    (10, 'Inventory margin summary', migrate_margin_summary),
+    (11, 'Margin list and low stock indexes', migrate_margin_list_indexes),
+    (12, 'Inventory change log', migrate_inventory_change_log),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def read_schema_version(connection):
+    try:
+        return connection.exec_driver_sql("SELECT max(version) FROM schema_version").scalar() or 0
+    except OperationalError:
+        return 0
+
+def run_migrations():
+    """Bring the database up to SCHEMA_VERSION and return the resulting version"""
+    with db.engine.connect() as connection:
+        current = read_schema_version(connection)
+        connection.rollback()
+        if current >= SCHEMA_VERSION:
+            return current
+
+        # BEGIN IMMEDIATE takes the write lock up front, so DDL is part of the
+        # transaction and two processes starting together cannot both migrate
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            connection.exec_driver_sql(
+                "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL, description VARCHAR(200), applied_at DATETIME)"
+            )
+            current = read_schema_version(connection)
+            for version, description, step in MIGRATIONS:
+                if version <= current:
+                    continue
+                print(f"Applying migration {version}: {description}")
+                step(connection)
+                connection.execute(
+                    text("INSERT INTO schema_version (version, description, applied_at) VALUES (:version, :description, :applied_at)"),
+                    {'version': version, 'description': description, 'applied_at': datetime.now()}
+                )
+                current = version
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        return current
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending schema migrations."""
+    print(f"Database schema at version {run_migrations()}.")
+
+# Fixture loading
+# Fixture files (JSON list of objects, or CSV with a header row) are upserted
+# by natural key with Core executemany, all in one transaction. Every row of a
+# file must carry the same fields. A reference field such as "supplier" is
+# resolved by name, creating the referenced row if it does not exist yet.
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FixtureSpec = namedtuple('FixtureSpec', ['name', 'model', 'key', 'references'])
+FIXTURES = [
+    FixtureSpec('suppliers', Supplier, 'name', {}),
+    FixtureSpec('inventory', Inventory, 'barcode', {'supplier': (Supplier, 'name', 'supplier_id')}),
+    FixtureSpec('staff', Staff, 'name', {}),
+]
+
+def read_fixture_rows(path):
+    """Yield the rows of a JSON or CSV fixture file as dicts"""
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as handle:
+            yield from csv.DictReader(handle)
+    else:
+        with open(path, encoding='utf-8') as handle:
+            yield from json.load(handle)
+
+def fixture_default(column):
+    """The value a new row gets for a column its fixture leaves blank"""
+    return column.default.arg if column.default is not None and column.default.is_scalar else None
+
+def fixture_converter(column):
+    """Build a function converting raw fixture values (CSV values are all strings) to a column's type
+
+    Blank values convert to None; fixture_statements decides what a blank means.
+    """
+    python_type = column.type.python_type
+    if python_type is date:
+        parse = date.fromisoformat
+    elif python_type is datetime:
+        parse = datetime.fromisoformat
+    elif python_type is int:
+        parse = lambda value: int(float(value))
+    elif python_type is float:
+        parse = float
+    else:
+        parse = None
+
+    def convert(value):
+        if value is None or value == '':
+            return None
+        if parse is not None and isinstance(value, str):
+            return parse(value)
+        return value
+    return convert
+
+def fixture_statements(table, key, columns, insert_only=()):
+    """Upsert SQL for one fixture table as (sql, parameters) pairs, keyed on its natural key
+
+    parameters lists (column, blank_to_default) pairs: a blank value is bound
+    as the column default where a new row is inserted, and as NULL in
+    coalesce(?, column) where an existing row is updated, so a blank cell
+    keeps the stored value. insert_only columns are set on new rows but never
+    overwritten on existing ones.
+    """
+    names = ', '.join(columns)
+    updates = [column for column in columns if column != key and column not in insert_only]
+    assignments = ', '.join(f'{column} = coalesce(?, {column})' for column in updates)
+    updated = [(column, False) for column in updates]
+    if table.c[key].unique:
+        # SQLite checks NOT NULL on the proposed row before ON CONFLICT, so a
+        # blank required cell takes the stored value there too; on a new row
+        # it is still NULL and fails as it should
+        values, value_parameters = [], []
+        for column in columns:
+            if column != key and not table.c[column].nullable and fixture_default(table.c[column]) is None:
+                values.append(f'coalesce(?, (SELECT {column} FROM {table.name} WHERE {key} = ?))')
+                value_parameters += [(column, True), (key, False)]
+            else:
+                values.append('?')
+                value_parameters.append((column, True))
+        conflict = f'DO UPDATE SET {assignments}' if updates else 'DO NOTHING'
+        return [(
+            f'INSERT INTO {table.name} ({names}) VALUES ({", ".join(values)}) ON CONFLICT ({key}) {conflict}',
+            value_parameters + updated
+        )]
+    placeholders = ', '.join('?' for _ in columns)
+    inserted = [(column, True) for column in columns]
+    statements = []
+    if updates:
+        statements.append((f'UPDATE {table.name} SET {assignments} WHERE {key} = ?', updated + [(key, False)]))
+    statements.append((
+        f'INSERT INTO {table.name} ({names}) SELECT {placeholders} '
+        f'WHERE NOT EXISTS (SELECT 1 FROM {table.name} WHERE {key} = ?)',
+        inserted + [(key, False)]
+    ))
+    return statements
+
+def resolve_fixture_references(connection, spec, batch, lookups):
+    """Replace reference fields (e.g. supplier name) with foreign key ids"""
+    for field, (model, key, foreign_key) in spec.references.items():
+        lookup = lookups.setdefault(field, {})
+        missing = {row[field] for row in batch if row.get(field) and row[field] not in lookup}
+        if missing:
+            table = model.__table__
+            connection.execute(
+                text(f'INSERT INTO {table.name} ({key}) SELECT :value '
+                     f'WHERE NOT EXISTS (SELECT 1 FROM {table.name} WHERE {key} = :value)'),
+                [{'value': value} for value in missing]
+            )
+            lookup.update(connection.execute(
+                select(table.c[key], table.c.id).where(table.c[key].in_(missing))
+            ).all())
+        for row in batch:
+            row[foreign_key] = lookup.get(row.pop(field, None))
+
+def upsert_fixture_batches(connection, spec, rows, batch_size):
+    """Upsert an iterable of fixture rows in batches, yielding the running row count after each
+
+    Only one batch is held in memory at a time.
+    """
+    table = spec.model.__table__
+    lookups, statements, columns, converters, defaults, batch, count = {}, None, None, None, None, [], 0
+
+    def flush():
+        nonlocal statements, columns, converters, defaults
+        resolve_fixture_references(connection, spec, batch, lookups)
+        if columns is None:
+            columns = [name for name in batch[0] if name in table.c]
+            # Columns with a default (e.g. quantity) still get it on new rows when the file omits them
+            defaulted = [column.name for column in table.c
+                         if column.name not in columns and column.default is not None and column.default.is_scalar]
+            columns += defaulted
+            statements = fixture_statements(table, spec.key, columns, insert_only=defaulted)
+            converters = [fixture_converter(table.c[column]) for column in columns]
+            defaults = {column: fixture_default(table.c[column]) for column in columns}
+        # Plain DB-API executemany: this loop is the whole cost of a large load
+        converted = [
+            dict(zip(columns, [convert(row.get(column)) for column, convert in zip(columns, converters)]))
+            for row in batch
+        ]
+        for sql, parameters in statements:
+            connection.exec_driver_sql(sql, [
+                tuple(defaults[column] if blank_to_default and row[column] is None else row[column]
+                      for column, blank_to_default in parameters)
+                for row in converted
+            ])
+
+    for row in rows:
+        batch.append(dict(row))
+        count += 1
+        if len(batch) >= batch_size:
+            flush()
+            batch = []
+            yield count
+    if batch:
+        flush()
+        yield count
+
+def load_fixture_file(connection, spec, path):
+    """Upsert every row of one fixture file and return the row count"""
+    count = 0
+    for count in upsert_fixture_batches(connection, spec, read_fixture_rows(path), app.config['FIXTURE_BATCH_SIZE']):
+        pass
+    return count
+
+def import_inventory_csv(handle, chunk_size):
+    """Stream an inventory CSV into the catalog, committing every chunk_size rows
+
+    A generator yielding the number of rows committed so far after each chunk.
+    Rows are upserted by barcode and the supplier column is resolved by name
+    through an in-memory map. Chunks already committed stay committed if a
+    later chunk fails.
+    """
+    spec = next(spec for spec in FIXTURES if spec.model is Inventory)
+    with db.engine.connect() as connection:
+        try:
+            for count in upsert_fixture_batches(connection, spec, csv.DictReader(handle), chunk_size):
+                connection.commit()
+                yield count
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            if barcode_index_loaded:
+                build_barcode_index()
+
+@app.cli.command('import-inventory')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', type=int, default=None, help='Rows per commit (default IMPORT_CHUNK_SIZE).')
+def import_inventory_command(path, chunk_size):
+    """Import an inventory catalog CSV in chunked commits."""
+    started = time.perf_counter()
+    count = 0
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        for count in import_inventory_csv(handle, chunk_size or app.config['IMPORT_CHUNK_SIZE']):
+            print(f"  {count:,} rows committed ({time.perf_counter() - started:.1f}s)")
+    print(f"Imported {count:,} inventory rows in {time.perf_counter() - started:.2f}s.")
+
+def find_fixture_file(directory, spec):
+    for extension in ('.json', '.csv'):
+        path = os.path.join(directory, spec.name + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+def load_fixtures(*paths, only_empty=False):
+    """Load fixture files or directories in dependency order, in one transaction
+
+    A directory is searched for <fixture name>.json or .csv; a file is matched
+    to its fixture by file name. With only_empty, tables that already contain
+    rows are skipped (used for first-run sample data). Returns row counts.
+    """
+    files = {}
+    for path in paths or (FIXTURES_DIR,):
+        for spec in FIXTURES:
+            if os.path.isdir(path):
+                found = find_fixture_file(path, spec)
+            elif os.path.splitext(os.path.basename(path))[0] == spec.name:
+                found = path
+            else:
+                found = None
+            if found:
+                files[spec.name] = found
+
+    loaded = {}
+    with db.engine.begin() as connection:
+        for spec in FIXTURES:
+            if spec.name not in files:
+                continue
+            if only_empty and connection.execute(select(spec.model.__table__.c.id).limit(1)).first():
+                continue
+            loaded[spec.name] = load_fixture_file(connection, spec, files[spec.name])
+    if loaded and barcode_index_loaded:
+        build_barcode_index()
+    return loaded
+
+@app.cli.command('load-fixtures')
+@click.argument('paths', nargs=-1, type=click.Path(exists=True))
+@click.option('--only-empty', is_flag=True, help='Skip tables that already have rows.')
+def load_fixtures_command(paths, only_empty):
+    """Upsert fixture files (JSON or CSV) by natural key."""
+    started = time.perf_counter()
+    loaded = load_fixtures(*paths, only_empty=only_empty)
+    for name, count in loaded.items():
+        print(f"Loaded {count} {name} rows.")
+    print(f"Done in {time.perf_counter() - started:.2f}s.")
+
+# Performance instrumentation
+# Opt-in (PERF_INSTRUMENTATION=1). Records query count, DB time, slowest
+# statements and template render time per request, reports them in a
+# Server-Timing header and keeps a rolling window per endpoint for /debug/perf.
+perf_samples = defaultdict(lambda: deque(maxlen=app.config['PERF_WINDOW']))
+perf_slowest = defaultdict(list)
+perf_lock = threading.Lock()
+
+def perf_enabled():
+    return app.config['PERF_INSTRUMENTATION'] and has_request_context() and 'perf' in g
+
+@app.before_request
+def start_request_timer():
+    if app.config['PERF_INSTRUMENTATION']:
+        g.perf = {'start': time.perf_counter(), 'queries': 0, 'db_time': 0.0, 'render_time': 0.0, 'statements': []}
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if perf_enabled():
+        conn.info.setdefault('perf_query_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if not perf_enabled() or not conn.info.get('perf_query_start'):
+        return
+    elapsed = time.perf_counter() - conn.info['perf_query_start'].pop()
+    g.perf['queries'] += 1
+    g.perf['db_time'] += elapsed
+    g.perf['statements'].append((elapsed, statement))
+
+@before_render_template.connect_via(app)
+def start_render_timer(sender, template, context, **extra):
+    if perf_enabled():
+        g.perf['render_start'] = time.perf_counter()
+
+@template_rendered.connect_via(app)
+def stop_render_timer(sender, template, context, **extra):
+    if perf_enabled() and 'render_start' in g.perf:
+        g.perf['render_time'] += time.perf_counter() - g.perf.pop('render_start')
+
+@app.after_request
+def record_request_timing(response):
+    if not perf_enabled():
+        return response
+    perf = g.perf
+    total_ms = (time.perf_counter() - perf['start']) * 1000
+    db_ms = perf['db_time'] * 1000
+    render_ms = perf['render_time'] * 1000
+    response.headers['Server-Timing'] = ', '.join([
+        f'db;dur={db_ms:.2f};desc="{perf["queries"]} queries"',
+        f'render;dur={render_ms:.2f}',
+        f'total;dur={total_ms:.2f}'
+    ])
+
+    slowest = sorted(perf['statements'], key=lambda entry: entry[0], reverse=True)[:app.config['PERF_SLOW_STATEMENTS']]
+    endpoint = request.endpoint or '<unmatched>'
+    with perf_lock:
+        perf_samples[endpoint].append((total_ms, db_ms, render_ms, perf['queries']))
+        # Keep the worst duration seen for each distinct statement
+        merged = dict((statement, duration) for duration, statement in perf_slowest[endpoint])
+        for elapsed, statement in slowest:
+            statement = ' '.join(statement.split())[:300]
+            merged[statement] = max(merged.get(statement, 0.0), elapsed * 1000)
+        perf_slowest[endpoint] = sorted(
+            ((duration, statement) for statement, duration in merged.items()), reverse=True
+        )[:app.config['PERF_SLOW_STATEMENTS']]
+    return response
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+@app.route('/debug/perf')
+def debug_perf():
+    """Rolling per-endpoint timings collected by the instrumentation hooks"""
+    if not app.config['PERF_INSTRUMENTATION']:
+        abort(404)
+    with perf_lock:
+        samples = {endpoint: list(window) for endpoint, window in perf_samples.items()}
+        slowest = {endpoint: list(entries) for endpoint, entries in perf_slowest.items()}
+
+    endpoints = {}
+    for endpoint, window in samples.items():
+        if not window:
+            continue
+        summary = {'requests': len(window)}
+        for index, metric in enumerate(['total_ms', 'db_ms', 'render_ms', 'queries']):
+            values = [sample[index] for sample in window]
+            summary[metric] = {
+                'p50': round(percentile(values, 0.50), 2),
+                'p95': round(percentile(values, 0.95), 2),
+                'p99': round(percentile(values, 0.99), 2),
+                'max': round(max(values), 2)
+            }
+        summary['slowest_statements'] = [
+            {'duration_ms': round(duration, 2), 'statement': statement} for duration, statement in slowest.get(endpoint, [])
+        ]
+        endpoints[endpoint] = summary
+    return jsonify({'window': app.config['PERF_WINDOW'], 'endpoints': endpoints})
+
+# Barcode lookup index
+# Process-wide barcode -> pre-serialized scan response, so a register scan
+# never has to touch the database. Write paths in this process call
+# index_inventory_items() after committing; writes by other processes (CLI
+# imports, fixture loads, other workers) are picked up from the inventory
+# change log at most BARCODE_INDEX_SYNC_INTERVAL seconds later. Every item's
+# entry remembers the change sequence number it was loaded at, so rows are
+# loaded without holding the lock and an older snapshot never replaces a
+# newer one. Lookups read the dict without locking.
+barcode_index = {}
+barcode_index_items = {}  # Item id -> (change seq, barcode) of the version indexed
+barcode_index_lock = threading.Lock()
+barcode_sync_lock = threading.Lock()
+barcode_index_loaded = False
+barcode_index_seq = 0  # Change log position the index has caught up with
+barcode_index_synced_at = 0.0
+
+def serialize_scan_item(item, supplier_name):
+    """Build the item payload returned by the scan endpoint"""
+    return {
+        'id': item.id,
+        'name': item.name,
+        'supplier': supplier_name or 'Unknown',
+        'quantity': item.quantity,
+        'price': item.price,
+        'cost_price': item.cost_price,
+        'department': item.department,
+        'unit_of_measure': item.unit_of_measure,
+        'image_url': item.image_url
+    }
+
+def _load_scan_rows(*criteria):
+    """Fetch (item id, change seq, item, supplier name) rows in one query"""
+    return db.session.query(
+        Inventory.id, func.coalesce(InventoryChange.seq, 0), Inventory, Supplier.name
+    ).outerjoin(
+        Supplier, Inventory.supplier_id == Supplier.id
+    ).outerjoin(
+        InventoryChange, InventoryChange.item_id == Inventory.id
+    ).filter(*criteria).all()
+
+def _load_changed_rows(since):
+    """Rows of items changed after change seq since; item is None for deleted items"""
+    return db.session.query(
+        InventoryChange.item_id, InventoryChange.seq, Inventory, Supplier.name
+    ).select_from(InventoryChange).outerjoin(
+        Inventory, Inventory.id == InventoryChange.item_id
+    ).outerjoin(
+        Supplier, Inventory.supplier_id == Supplier.id
+    ).filter(InventoryChange.seq > since).all()
+
+def _store_scan_rows(rows):
+    """Apply loaded rows to the index, skipping any older than the version it holds"""
+    entries = [
+        (item_id, seq, item.barcode if item is not None else None,
+         app.json.dumps({'found': True, 'item': serialize_scan_item(item, supplier_name)}) if item is not None else None)
+        for item_id, seq, item, supplier_name in sorted(rows, key=lambda row: row[1])
+    ]
+    with barcode_index_lock:
+        for item_id, seq, barcode, payload in entries:
+            indexed_seq, indexed_barcode = barcode_index_items.get(item_id, (-1, None))
+            if seq < indexed_seq:
+                continue
+            if indexed_barcode and indexed_barcode != barcode:
+                barcode_index.pop(indexed_barcode, None)
+            barcode_index_items[item_id] = (seq, barcode)
+            if barcode:
+                barcode_index[barcode] = payload
+
+def build_barcode_index():
+    """Load every inventory item into the in-memory barcode index"""
+    global barcode_index_loaded, barcode_index_seq, barcode_index_synced_at
+    with barcode_sync_lock:
+        # Read the log position first: changes committed while loading are applied again by the next sync
+        seq = db.session.query(func.coalesce(func.max(InventoryChange.seq), 0)).scalar()
+        rows = _load_scan_rows()
+        with barcode_index_lock:
+            barcode_index.clear()
+            barcode_index_items.clear()
+        _store_scan_rows(rows)
+        barcode_index_seq, barcode_index_synced_at = seq, time.monotonic()
+        barcode_index_loaded = True
+    return len(barcode_index)
+
+def sync_barcode_index():
+    """Apply inventory changes committed since the last sync, by any process
+
+    Runs in one thread at a time; other threads keep answering from the
+    index meanwhile.
+    """
+    global barcode_index_seq, barcode_index_synced_at
+    if not barcode_sync_lock.acquire(blocking=False):
+        return
+    try:
+        barcode_index_synced_at = time.monotonic()
+        rows = _load_changed_rows(barcode_index_seq)
+        _store_scan_rows(rows)
+        barcode_index_seq = max([barcode_index_seq] + [seq for _, seq, _, _ in rows])
+    finally:
+        barcode_sync_lock.release()
+
+def index_inventory_items(item_ids):
+    """Refresh the index entries of the given inventory items after a write"""
+    if not barcode_index_loaded or not item_ids:
+        return
+    _store_scan_rows(_load_scan_rows(Inventory.id.in_(list(item_ids))))
+
+def lookup_barcode(barcode):
+    """Return the serialized scan response for a barcode, or None if unknown"""
+    if barcode is None or barcode == '':
+        return None
+    barcode = str(barcode)  # The column is text; a numeric barcode matches it as the database would
+    if not barcode_index_loaded:
+        build_barcode_index()
+    elif time.monotonic() - barcode_index_synced_at >= app.config['BARCODE_INDEX_SYNC_INTERVAL']:
+        sync_barcode_index()
+    cached = barcode_index.get(barcode)
+    if cached is None:
+        # Not indexed yet, e.g. added since the last sync
+        _store_scan_rows(_load_scan_rows(Inventory.barcode == barcode))
+        cached = barcode_index.get(barcode)
+    return cached
+
+# Reporting
+# KPI cards are computed with single aggregate queries so pages never load
+# whole tables just to count or sum them.
+def inventory_stock_summary():
+    """Item counts for the inventory report cards"""
+    row = db.session.query(
+        func.count(Inventory.id).label('total_items'),
+        func.count(Inventory.id).filter(Inventory.quantity > 0).label('in_stock'),
+        func.count(Inventory.id).filter(Inventory.quantity < 10).label('low_stock'),
+        func.count(Inventory.id).filter(Inventory.quantity == 0).label('out_of_stock')
+    ).one()
+    return row._asdict()
+
+def sales_summary(today=None):
+    """Revenue totals for the revenue report cards, read from the daily rollup"""
+    today = today or date.today()
+    start_of_month = date(today.year, today.month, 1)
+    # Month to date against the same days of the previous month
+    start_of_last_month = (start_of_month - timedelta(days=1)).replace(day=1)
+    same_day_last_month = start_of_last_month + (today - start_of_month)
+    rollup = DailySalesRollup
+    row = db.session.query(
+        func.coalesce(func.sum(rollup.revenue), 0.0).label('total_revenue'),
+        func.coalesce(func.sum(rollup.revenue).filter(rollup.date >= start_of_month), 0.0).label('month_revenue'),
+        func.coalesce(func.sum(rollup.revenue).filter(
+            rollup.date >= start_of_last_month, rollup.date <= same_day_last_month
+        ), 0.0).label('last_month_revenue'),
+        func.coalesce(func.sum(rollup.orders), 0).label('order_count'),
+        func.coalesce(func.sum(rollup.units), 0).label('units_sold')
+    ).one()
+    summary = row._asdict()
+    summary['average_order_value'] = summary['total_revenue'] / summary['order_count'] if summary['order_count'] else 0
+    summary['items_per_order'] = summary['units_sold'] / summary['order_count'] if summary['order_count'] else 0
+    summary['growth_rate'] = (
+        (summary['month_revenue'] - summary['last_month_revenue']) / summary['last_month_revenue'] * 100
+        if summary['last_month_revenue'] else None
+    )
+    return summary
+
+def monthly_revenue(months=3):
+    """Revenue per calendar month, most recent first"""
+    month = func.strftime('%Y-%m', DailySalesRollup.date)
+    rows = db.session.query(month.label('month'), func.sum(DailySalesRollup.revenue).label('revenue')).group_by(
+        month
+    ).order_by(month.desc()).limit(months).all()
+    return [
+        {'label': datetime.strptime(row.month, '%Y-%m').strftime('%B %Y'), 'revenue': row.revenue}
+        for row in rows
+    ]
+
+def daily_revenue(days=30, today=None):
+    """Revenue for each of the last days days, oldest first, with zero for days without sales"""
+    today = today or date.today()
+    start = today - timedelta(days=days - 1)
+    rows = db.session.query(DailySalesRollup.date, func.sum(DailySalesRollup.revenue)).filter(
+        DailySalesRollup.date >= start
+    ).group_by(DailySalesRollup.date).all()
+    revenue = dict(rows)
+    return [
+        {'date': (start + timedelta(days=offset)).isoformat(), 'revenue': round(revenue.get(start + timedelta(days=offset), 0.0), 2)}
+        for offset in range(days)
+    ]
+
+def staff_revenue(days=30, limit=5, today=None):
+    """Staff members with the most revenue over the last days days"""
+    start = (today or date.today()) - timedelta(days=days - 1)
+    total = func.sum(DailySalesRollup.revenue)
+    rows = db.session.query(Staff.name, total.label('revenue')).join(
+        Staff, Staff.id == DailySalesRollup.staff_id
+    ).filter(DailySalesRollup.date >= start).group_by(Staff.id).order_by(total.desc()).limit(limit).all()
+    return [{'name': row.name, 'revenue': round(row.revenue, 2)} for row in rows]
+
+# Items with a price and cost are the ones the margin page reports on
+margin_filter = and_(Inventory.price > 0, Inventory.cost_price > 0)
+MARGIN_SORTS = {
+    'margin': inventory_margin_ratio,
+    'profit': inventory_margin_amount,
+    'name': Inventory.name,
+    'price': Inventory.price,
+    'cost': Inventory.cost_price,
+}
+
+def margin_summary():
+    """Totals, average margin and margin-band counts for the margin page, from the margin summary"""
+    bands = {row.band: row for row in InventoryMarginSummary.query.all()}
+    item_count = sum(row.item_count for row in bands.values())
+    count = lambda band: bands[band].item_count if band in bands else 0
+    return {
+        'item_count': item_count,
+        'total_revenue': round(sum((row.revenue for row in bands.values()), 0.0), 2),
+        'total_profit': round(sum((row.profit for row in bands.values()), 0.0), 2),
+        'average_margin': sum(row.margin_sum for row in bands.values()) / item_count * 100 if item_count else 0.0,
+        'high_margin_count': count('high'),
+        'good_margin_count': count('good'),
+        'low_margin_count': count('low')
+    }
+
+def margin_row(item):
+    """Margin figures of one inventory item as the margin template expects them"""
+    return {
+        'item': item,
+        'margin_percentage': round((item.price - item.cost_price) / item.price * 100, 2),
+        'margin_amount': round(item.price - item.cost_price, 2)
+    }
+
+def ranked_margins(descending, limit):
+    """The best (or worst) margin items, ordered in SQL"""
+    order = inventory_margin_ratio.desc() if descending else inventory_margin_ratio.asc()
+    items = Inventory.query.filter(margin_filter).order_by(order).limit(limit).all()
+    return [margin_row(item) for item in items]
+
+def payroll_summary(today=None):
+    """Payroll totals for the payroll report cards"""
+    today = today or date.today()
+    start_of_month = today.replace(day=1)
+    row = db.session.query(
+        func.coalesce(func.sum(Payroll.amount), 0.0).label('total_paid'),
+        func.coalesce(func.sum(Payroll.amount).filter(Payroll.pay_date >= start_of_month), 0.0).label('month_paid'),
+        func.count(func.distinct(Payroll.staff_id)).label('employees_paid')
+    ).one()
+    return row._asdict()
+
+# Timesheets
+# Hours and overtime per staff member per Monday-Sunday week, computed in one
+# query: entries are summed per day, then folded into weeks. Daily overtime is
+# time past DAILY_OVERTIME_HOURS in a day; weekly overtime is regular time past
+# WEEKLY_OVERTIME_HOURS in a week, so no hour is counted twice. Rows are read
+# through ix_work_hour_staff_date with one range seek per staff member.
+TIMESHEET_WEEKS_SQL = """
+    WITH days AS (
+        SELECT staff_id, date, sum(hours_worked) AS hours
+        FROM work_hour
+        WHERE {staff_filter} AND date BETWEEN :start AND :end
+        GROUP BY staff_id, date
+    ), weeks AS (
+        SELECT staff_id, date(date, 'weekday 0', '-6 days') AS week_start, sum(hours) AS hours,
+               sum(max(hours - :daily_limit, 0)) AS daily_overtime, count(*) AS days_worked,
+               json_group_object(date, hours) AS days
+        FROM days
+        GROUP BY staff_id, week_start
+    )
+    SELECT weeks.*, staff.name, max(hours - daily_overtime - :weekly_limit, 0) AS weekly_overtime
+    FROM weeks
+    LEFT JOIN staff ON staff.id = weeks.staff_id
+    ORDER BY week_start, staff.name
+"""
+
+def week_range(start, end):
+    """Widen start..end to whole Monday-Sunday weeks"""
+    return start - timedelta(days=start.weekday()), end + timedelta(days=6 - end.weekday())
+
+def timesheet_rows(start, end, staff_id=None):
+    """One dict per staff member per week worked, counting only days from start to end"""
+    rows = db.session.execute(
+        text(TIMESHEET_WEEKS_SQL.format(staff_filter='staff_id = :staff_id' if staff_id is not None else 'staff_id IN (SELECT id FROM staff)')),
+        {'start': start.isoformat(), 'end': end.isoformat(), 'staff_id': staff_id,
+         'daily_limit': app.config['DAILY_OVERTIME_HOURS'], 'weekly_limit': app.config['WEEKLY_OVERTIME_HOURS']}
+    ).all()
+    return [{
+        'staff_id': row.staff_id,
+        'name': row.name,
+        'week_start': row.week_start,
+        'hours': round(row.hours, 2),
+        'regular_hours': round(row.hours - row.daily_overtime - row.weekly_overtime, 2),
+        'daily_overtime': round(row.daily_overtime, 2),
+        'weekly_overtime': round(row.weekly_overtime, 2),
+        'overtime': round(row.daily_overtime + row.weekly_overtime, 2),
+        'days_worked': row.days_worked,
+        'days': json.loads(row.days)
+    } for row in rows]
+
+def timesheet_weeks(start, end, staff_id=None):
+    """One dict per staff member per week worked between start and end (widened to whole weeks)"""
+    return timesheet_rows(*week_range(start, end), staff_id)
+
+def timesheet_report(start, end, staff_id=None):
+    """Weekly rows between start and end plus their totals and distinct staff count"""
+    weeks = timesheet_weeks(start, end, staff_id)
+    start, end = week_range(start, end)
+    totals = {key: round(sum(week[key] for week in weeks), 2)
+              for key in ('hours', 'regular_hours', 'daily_overtime', 'weekly_overtime', 'overtime')}
+    totals['staff_count'] = len({week['staff_id'] for week in weeks})
+    return {'start': start.isoformat(), 'end': end.isoformat(), 'weeks': weeks, 'totals': totals}
+
+def timesheet_summary(today=None):
+    """Hour totals for the timesheet report cards, over the last TIMESHEET_WEEKS weeks"""
+    today = today or date.today()
+    report = timesheet_report(today - timedelta(weeks=app.config['TIMESHEET_WEEKS'] - 1), today)
+    start_of_week = (today - timedelta(days=today.weekday())).isoformat()
+    return {
+        'start': report['start'],
+        'end': report['end'],
+        'total_hours': report['totals']['hours'],
+        'week_hours': round(sum(week['hours'] for week in report['weeks'] if week['week_start'] == start_of_week), 2),
+        'employee_count': report['totals']['staff_count'],
+        'overtime_hours': report['totals']['overtime']
+    }
+
+# Payroll runs
+# A run pays every hourly and salaried staff member for one pay period in a
+# single transaction. Hourly pay comes from the timesheet engine (overtime at
+# OVERTIME_PAY_RATE); salaries are yearly and prorated by calendar days.
+# Rows are upserted on (staff_id, period_start, period_end), so running the
+# same period again recalculates it instead of paying twice. Periods that
+# start on a Monday get exact weekly overtime; partial weeks at the edges of
+# other periods only see their in-period days.
+PAYROLL_UPSERT = text("""
+    INSERT INTO payroll (staff_id, pay_date, amount, period_start, period_end)
+    VALUES (:staff_id, :pay_date, :amount, :period_start, :period_end)
+    ON CONFLICT (staff_id, period_start, period_end) DO UPDATE SET
+        pay_date = excluded.pay_date,
+        amount = excluded.amount
+""")
+
+def run_payroll(start, end, pay_date=None, pay_type=None):
+    """Write Payroll rows for start..end and return a summary; the caller owns the transaction
+
+    pay_type limits the run to 'Hourly' or 'Salary' staff. Hourly staff with
+    no hours in the period get no row.
+    """
+    pay_types = [pay_type] if pay_type else ['Hourly', 'Salary']
+    staff = db.session.execute(
+        select(Staff.id, Staff.pay, Staff.pay_type).where(Staff.pay_type.in_(pay_types), Staff.pay.isnot(None))
+    ).all()
+
+    hours = defaultdict(lambda: [0.0, 0.0])
+    if 'Hourly' in pay_types:
+        for week in timesheet_rows(start, end):
+            hours[week['staff_id']][0] += week['regular_hours']
+            hours[week['staff_id']][1] += week['overtime']
+
+    days = (end - start).days + 1
+    rows, totals = [], {'Hourly': 0.0, 'Salary': 0.0}
+    for member in staff:
+        if member.pay_type == 'Hourly':
+            if member.id not in hours:
+                continue
+            regular, overtime = hours[member.id]
+            amount = member.pay * (regular + overtime * app.config['OVERTIME_PAY_RATE'])
+        else:
+            amount = member.pay * days / 365
+        amount = round(amount, 2)
+        totals[member.pay_type] += amount
+        rows.append({'staff_id': member.id, 'pay_date': (pay_date or end).isoformat(), 'amount': amount,
+                     'period_start': start.isoformat(), 'period_end': end.isoformat()})
+
+    if rows:
+        db.session.execute(PAYROLL_UPSERT, rows)
+    return {
+        'period_start': start.isoformat(),
+        'period_end': end.isoformat(),
+        'pay_date': (pay_date or end).isoformat(),
+        'employees': len(rows),
+        'total': round(sum(totals.values()), 2),
+        'hourly_total': round(totals['Hourly'], 2),
+        'salary_total': round(totals['Salary'], 2)
+    }
+
+@app.cli.command('run-payroll')
+@click.argument('start', type=click.DateTime(formats=['%Y-%m-%d']))
+@click.argument('end', type=click.DateTime(formats=['%Y-%m-%d']))
+@click.option('--pay-date', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Defaults to the last day of the period.')
+@click.option('--pay-type', type=click.Choice(['Hourly', 'Salary']), default=None, help='Only pay staff of this pay type.')
+def run_payroll_command(start, end, pay_date, pay_type):
+    """Pay every staff member for the period START..END (YYYY-MM-DD); safe to re-run."""
+    if start > end:
+        raise click.BadParameter('START must not be after END')
+    started = time.perf_counter()
+    summary = commit_with_retry(lambda: run_payroll(start.date(), end.date(), pay_date.date() if pay_date else None, pay_type))
+    print(f"Paid {summary['employees']:,} staff ${summary['total']:,.2f} for {summary['period_start']} to {summary['period_end']} "
+          f"in {time.perf_counter() - started:.2f}s.")
+
+# Keyset pagination
+# List pages take ?after=<id> / ?before=<id> and &limit=. The cursor row's
+# sort key is looked up inside the query, so a page costs the same no
+# matter how deep into the table it is.
+KeysetPage = namedtuple('KeysetPage', ['items', 'next_cursor', 'prev_cursor', 'limit'])
+
+def page_args():
+    """Read after/before/limit from the query string"""
+    limit = request.args.get('limit', app.config['PAGE_SIZE'], type=int)
+    return {
+        'after': request.args.get('after', type=int),
+        'before': request.args.get('before', type=int),
+        'limit': max(1, min(limit, app.config['MAX_PAGE_SIZE']))
+    }
+
+def keyset_paginate(query, model, sort_key=None, descending=False, after=None, before=None, limit=50):
+    """Return one page of query ordered by (sort_key, id)
+
+    sort_key defaults to the primary key. Rows tied on sort_key are ordered
+    by id in the same direction, so every row has a stable position. The
+    cursor condition is written as a range on sort_key (key <= anchor AND
+    (key < anchor OR id < cursor)) so SQLite seeks to the cursor in the
+    sort_key index instead of walking it from the first row.
+    """
+    id_column = model.id
+    key = sort_key if sort_key is not None else id_column
+    cursor = after if after is not None else before
+    backwards = after is None and before is not None
+
+    if cursor is not None:
+        anchor = select(key).where(id_column == cursor).scalar_subquery()
+        # Moving forward in a descending list (or backward in an ascending one) means smaller keys
+        smaller = descending != backwards
+        if key is id_column:
+            condition = id_column < cursor if smaller else id_column > cursor
+        elif smaller:
+            condition = and_(key <= anchor, or_(key < anchor, id_column < cursor))
+        else:
+            condition = and_(key >= anchor, or_(key > anchor, id_column > cursor))
+        query = query.filter(condition)
+
+    reverse_order = descending != backwards
+    order = [key.desc(), id_column.desc()] if reverse_order else [key.asc(), id_column.asc()]
+    if key is id_column:
+        order = order[1:]
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, after is not None
+
+    return KeysetPage(
+        items=rows,
+        next_cursor=rows[-1].id if rows and has_next else None,
+        prev_cursor=rows[0].id if rows and has_prev else None,
+        limit=limit
+    )
+
+@app.template_global()
+def page_url(**cursor):
+    """URL of the current page with the cursor arguments replaced"""
+    args = request.args.to_dict()
+    args.pop('after', None)
+    args.pop('before', None)
+    args.update({name: value for name, value in cursor.items() if value is not None})
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+def wants_json():
+    """True when a list page was asked for its JSON variant (?format=json)"""
+    return request.args.get('format') == 'json'
+
+def serialize_row(row):
+    """Plain dict of a model's columns, with dates as ISO strings"""
+    data = {}
+    for column in row.__table__.columns:
+        value = getattr(row, column.name)
+        data[column.name] = value.isoformat() if isinstance(value, (date, datetime)) else value
+    return data
+
+def page_json(page):
+    """JSON response for a KeysetPage"""
+    return jsonify({
+        'items': [serialize_row(row) for row in page.items],
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+        'limit': page.limit
+    })
+
+# Data export
+# Whole-table CSV/NDJSON downloads streamed from a server-side cursor. Rows are
+# fetched EXPORT_BATCH_SIZE at a time and written out chunk by chunk, so memory
+# stays flat whatever the table size and the header goes out before the query runs.
+ExportSpec = namedtuple('ExportSpec', ['model', 'related', 'label'])
+
+EXPORTS = {
+    'inventory': ExportSpec(Inventory, Supplier, 'supplier_name'),
+    'sales': ExportSpec(Sale, None, None),
+    'payroll': ExportSpec(Payroll, Staff, 'staff_name'),
+    'timesheets': ExportSpec(WorkHour, Staff, 'staff_name'),
+}
+
+def export_query(spec):
+    """All columns of an export's table, plus the related row's name, in id order"""
+    query = select(spec.model.__table__)
+    if spec.related is not None:
+        query = query.add_columns(spec.related.name.label(spec.label)).outerjoin(spec.related.__table__)
+    return query.order_by(spec.model.id)
+
+def export_batches(query):
+    """Yield lists of result rows, EXPORT_BATCH_SIZE at a time"""
+    with db.engine.connect() as connection:
+        result = connection.execution_options(yield_per=app.config['EXPORT_BATCH_SIZE']).execute(query)
+        yield from result.partitions()
+
+def export_value(value):
+    """JSON-safe value, with dates as ISO strings"""
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+def export_csv(query):
+    """Yield CSV text for a query, one chunk per batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(query.selected_columns.keys())
+    yield buffer.getvalue()
+    for rows in export_batches(query):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+def export_ndjson(query):
+    """Yield NDJSON text for a query, one chunk per batch"""
+    keys = query.selected_columns.keys()
+    for rows in export_batches(query):
+        yield ''.join(json.dumps(dict(zip(keys, map(export_value, row)))) + '\n' for row in rows)
+
+EXPORT_FORMATS = {
+    'csv': (export_csv, 'text/csv'),
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+}
+
+@app.route('/export/<name>.<fmt>')
+def export_table(name, fmt):
+    """Stream a whole table as CSV or NDJSON, e.g. /export/payroll.csv"""
+    if name not in EXPORTS or fmt not in EXPORT_FORMATS:
+        abort(404)
+    write, mimetype = EXPORT_FORMATS[fmt]
+    response = app.response_class(stream_with_context(write(export_query(EXPORTS[name]))), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={name}-{date.today().isoformat()}.{fmt}'
+    return response
 
 # Routes
 @app.route('/')
@@ -191,8 +1453,10 @@ def inventory():
 
 @app.route('/inventory/reports')
 def inventory_reports():
-    inventory_items = Inventory.query.all()
-    return render_template('inventory/reports.html', inventory_items=inventory_items)
+    page = keyset_paginate(Inventory.query.options(joinedload(Inventory.supplier)), Inventory, **page_args())
+    if wants_json():
+        return page_json(page)
+    return render_template('inventory/reports.html', inventory_items=page.items, page=page, stats=inventory_stock_summary())
 
 @app.route('/inventory/schedule')
 def inventory_schedule():
@@ -207,27 +1471,45 @@ def scan_barcode():
     data = request.get_json()
     barcode = data.get('barcode')
 
-    # Check if item exists
-    item = Inventory.query.filter_by(barcode=barcode).first()
+    # Serve hits straight from the in-memory index
+    cached = lookup_barcode(barcode)
 
-    if item:
-        return jsonify({
-            'found': True,
-            'item': {
-                'id': item.id,
-                'name': item.name,
-                'supplier': item.supplier.name if item.supplier else 'Unknown',
-                'quantity': item.quantity,
-                'price': item.price,
-                'cost_price': item.cost_price,
-                'department': item.department,
-                'unit_of_measure': item.unit_of_measure,
-                'image_url': item.image_url
-            }
-        })
+    if cached is not None:
+        return app.response_class(cached, mimetype='application/json')
     else:
         return jsonify({'found': False})
 
+@app.route('/api/inventory/scan/batch', methods=['POST'])
+def scan_barcode_batch():
+    data = request.get_json()
+    barcodes = data.get('barcodes')
+
+    if not isinstance(barcodes, list) or not barcodes or not all(isinstance(barcode, str) for barcode in barcodes):
+        return jsonify({'success': False, 'error': 'barcodes must be a non-empty list of strings'}), 400
+    if len(barcodes) > app.config['MAX_BATCH_SCAN']:
+        return jsonify({'success': False, 'error': f"At most {app.config['MAX_BATCH_SCAN']} barcodes per batch"}), 400
+
+    # Resolve every distinct barcode (and its supplier) in a single query
+    rows = _load_scan_rows(Inventory.barcode.in_(set(barcodes)))
+    found = {item.barcode: serialize_scan_item(item, supplier_name) for _, _, item, supplier_name in rows}
+    if barcode_index_loaded:
+        _store_scan_rows(rows)
+
+    # Answer in input order, duplicates included
+    results = []
+    for barcode in barcodes:
+        if barcode in found:
+            results.append({'barcode': barcode, 'found': True, 'item': found[barcode]})
+        else:
+            results.append({'barcode': barcode, 'found': False})
+
+    return jsonify({
+        'success': True,
+        'results': results,
+        'found_count': sum(1 for result in results if result['found']),
+        'not_found_count': sum(1 for result in results if not result['found'])
+    })
+
 @app.route('/api/inventory/add', methods=['POST'])
 def add_inventory_item():
     data = request.get_json()
@@ -258,47 +1540,228 @@ def add_inventory_item():
 
     db.session.add(new_item)
     db.session.commit()
+    index_inventory_items([new_item.id])
 
     return jsonify({'success': True, 'item_id': new_item.id})
 
+def is_database_locked(error):
+    """True if an OperationalError is SQLite reporting SQLITE_BUSY"""
+    return "database is locked" in str(error).lower()
+
+def commit_with_retry(work):
+    """Run work() in the session's transaction and commit, returning its result
+
+    If SQLite reports the database locked, the transaction is rolled back
+    and work() is run again after a jittered exponential backoff.
+    """
+    retries = app.config['SQLITE_BUSY_RETRIES']
+    for attempt in range(retries + 1):
+        try:
+            result = work()
+            db.session.commit()
+            return result
+        except OperationalError as e:
+            db.session.rollback()
+            if not is_database_locked(e) or attempt == retries:
+                raise
+            time.sleep(app.config['SQLITE_BUSY_BACKOFF'] * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+def adjust_quantity(item_id, quantity_change):
+    """Atomically add quantity_change to an item and commit
+
+    The increment happens inside the database, so concurrent scanners never
+    lose each other's updates. A NULL quantity counts as 0. Returns the
+    updated row, or None if the item does not exist.
+    """
+    def work():
+        return db.session.execute(
+            text("UPDATE inventory SET quantity = max(0, coalesce(quantity, 0) + :change) "
+                 "WHERE id = :id RETURNING quantity"),
+            {'id': item_id, 'change': quantity_change}
+        ).first()
+    return commit_with_retry(work)
+
+def is_whole_number(value):
+    """True for an int that is not a bool, as JSON quantities must be"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+@app.route('/api/inventory/import', methods=['POST'])
+def import_inventory():
+    """Upsert an uploaded catalog CSV (multipart field 'file'), streaming progress as NDJSON"""
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'success': False, 'error': "Upload the catalog as multipart field 'file'"})
+    chunk_size = max(1, request.args.get('chunk_size', app.config['IMPORT_CHUNK_SIZE'], type=int))
+
+    # The upload is closed when the request ends, before the response body is
+    # streamed, so spool it to a temp file the generator owns
+    spool = tempfile.NamedTemporaryFile(suffix='.csv', delete=False)
+    with spool:
+        upload.save(spool)
+
+    def generate():
+        started = time.perf_counter()
+        rows = 0
+        try:
+            with open(spool.name, newline='', encoding='utf-8-sig') as handle:
+                for rows in import_inventory_csv(handle, chunk_size):
+                    yield json.dumps({'rows': rows, 'elapsed': round(time.perf_counter() - started, 3)}) + '\n'
+        except Exception as e:
+            yield json.dumps({'success': False, 'error': str(e), 'rows': rows}) + '\n'
+            return
+        finally:
+            os.remove(spool.name)
+        yield json.dumps({'success': True, 'rows': rows, 'elapsed': round(time.perf_counter() - started, 3)}) + '\n'
+
+    return app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/inventory/update-quantity', methods=['POST'])
 def update_inventory_quantity():
     data = request.get_json()
     item_id = data.get('item_id')
-    quantity_change = data.get('quantity_change', 0)
+    quantity_change = data.get('quantity_change')
+    if not is_whole_number(quantity_change):
+        return jsonify({'success': False, 'error': 'quantity_change must be a whole number'}), 400
 
-    item = Inventory.query.get(item_id)
-    if item:
-        item.quantity = max(0, item.quantity + quantity_change)
-        db.session.commit()
-        return jsonify({'success': True, 'new_quantity': item.quantity})
+    row = adjust_quantity(item_id, quantity_change)
+    if row is None:
+        return jsonify({'success': False, 'error': 'Item not found'})
 
-    return jsonify({'success': False, 'error': 'Item not found'})
+    index_inventory_items([item_id])
+    return jsonify({'success': True, 'new_quantity': row.quantity})
 
 @app.route('/api/inventory/bulk-update', methods=['POST'])
 def bulk_update_inventory():
     data = request.get_json()
     items = data.get('items', [])
-
-    updated_items = []
-    for item_data in items:
-        item = Inventory.query.get(item_data['id'])
-        if item:
-            item.quantity = max(0, item.quantity + item_data.get('quantity_change', 0))
-            updated_items.append({
-                'id': item.id,
-                'name': item.name,
-                'new_quantity': item.quantity
-            })
+    if not isinstance(items, list) or not all(
+        isinstance(item_data, dict) and is_whole_number(item_data.get('id'))
+        and is_whole_number(item_data.get('quantity_change', 0))
+        for item_data in items
+    ):
+        return jsonify({'success': False, 'error': 'Each item needs a whole number id and quantity_change'}), 400
+
+    updated_items = apply_quantity_deltas(
+        [(item_data['id'], item_data.get('quantity_change', 0)) for item_data in items]
+    )
 
     db.session.commit()
+    index_inventory_items([entry['id'] for entry in updated_items])
     return jsonify({'success': True, 'updated_items': updated_items})
 
+def apply_quantity_deltas(deltas):
+    """Apply (item_id, quantity_change) pairs with one set-based UPDATE
+
+    The deltas are staged in a temp table with a single executemany, summed
+    per item, and applied in one statement that reports the new quantities
+    via RETURNING. The caller owns the transaction.
+    """
+    if not deltas:
+        return []
+    connection = db.session.connection()
+    connection.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS inventory_delta (id INTEGER NOT NULL, change INTEGER NOT NULL)"
+    ))
+    connection.execute(text("DELETE FROM inventory_delta"))  # Rows left by the previous call on this connection
+    connection.execute(
+        text("INSERT INTO inventory_delta (id, change) VALUES (:id, :change)"),
+        [{'id': item_id, 'change': change} for item_id, change in deltas]
+    )
+    rows = connection.execute(text("""
+        UPDATE inventory
+        SET quantity = max(0, coalesce(inventory.quantity, 0) + delta.change)
+        FROM (SELECT id, sum(change) AS change FROM inventory_delta GROUP BY id) AS delta
+        WHERE inventory.id = delta.id
+        RETURNING inventory.id, inventory.name, inventory.quantity
+    """)).all()
+
+    # Report in the order the items were first sent
+    position = {}
+    for item_id, _ in deltas:
+        position.setdefault(item_id, len(position))
+    rows.sort(key=lambda row: position[row.id])
+    return [{'id': row.id, 'name': row.name, 'new_quantity': row.quantity} for row in rows]
+
+class UnknownBarcode(Exception):
+    """A checkout cart names barcodes that are not in the catalog; args[0] lists them"""
+
+def record_checkout(cart, staff_id=None):
+    """Write one register sale: Order, OrderItems, Sale and the stock decrement
+
+    cart maps barcode -> quantity. The barcodes are resolved with one query,
+    the order lines go in with one executemany and stock is decremented with
+    apply_quantity_deltas, so a checkout costs the same number of statements
+    whatever the cart size. Prices come from the catalog. Raises UnknownBarcode
+    listing unknown barcodes. The caller owns the transaction.
+    """
+    rows = db.session.execute(
+        select(Inventory.id, Inventory.barcode, Inventory.name, Inventory.price).where(Inventory.barcode.in_(cart))
+    ).all()
+    by_barcode = {row.barcode: row for row in rows}
+    missing = [barcode for barcode in cart if barcode not in by_barcode]
+    if missing:
+        raise UnknownBarcode(missing)
+
+    now = datetime.now()
+    lines = [(by_barcode[barcode], quantity) for barcode, quantity in cart.items()]
+    total = round(sum(row.price * quantity for row, quantity in lines), 2)
+    order_id = db.session.execute(insert(Order).values(date=now, staff_id=staff_id).returning(Order.id)).scalar_one()
+    db.session.execute(insert(OrderItem), [
+        {'order_id': order_id, 'inventory_id': row.id, 'quantity': quantity, 'price': row.price}
+        for row, quantity in lines
+    ])
+    sale_id = db.session.execute(insert(Sale).values(order_id=order_id, total=total, date=now).returning(Sale.id)).scalar_one()
+    stock = {entry['id']: entry['new_quantity'] for entry in apply_quantity_deltas(
+        [(row.id, -quantity) for row, quantity in lines]
+    )}
+
+    return {
+        'order_id': order_id,
+        'sale_id': sale_id,
+        'total': total,
+        'items': [{
+            'id': row.id,
+            'barcode': row.barcode,
+            'name': row.name,
+            'quantity': quantity,
+            'price': row.price,
+            'line_total': round(row.price * quantity, 2),
+            'new_quantity': stock.get(row.id)
+        } for row, quantity in lines]
+    }
+
+@app.route('/api/checkout', methods=['POST'])
+def checkout():
+    """Record a sale from a cart of {"barcode", "quantity"} lines in one transaction"""
+    data = request.get_json()
+    cart = {}
+    items = data.get('items', [])
+    if not isinstance(items, list):
+        return jsonify({'success': False, 'error': 'items must be a list of {"barcode", "quantity"} lines'}), 400
+    for line in items:
+        if not isinstance(line, dict):
+            return jsonify({'success': False, 'error': 'Each item needs a barcode and a positive whole quantity'}), 400
+        barcode, quantity = line.get('barcode'), line.get('quantity', 1)
+        if not barcode or not isinstance(barcode, str) or not is_whole_number(quantity) or quantity < 1:
+            return jsonify({'success': False, 'error': 'Each item needs a barcode and a positive whole quantity'}), 400
+        cart[barcode] = cart.get(barcode, 0) + quantity
+    if not cart:
+        return jsonify({'success': False, 'error': 'Cart is empty'})
+
+    try:
+        sale = commit_with_retry(lambda: record_checkout(cart, data.get('staff_id')))
+    except UnknownBarcode as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': 'Unknown barcode', 'missing': e.args[0]})
+
+    index_inventory_items([item['id'] for item in sale['items']])
+    return jsonify({'success': True, **sale})
+
 @app.route('/api/inventory/status')
 def inventory_status():
     """Debug route to check current inventory status"""
     total_items = Inventory.query.count()
-    low_stock_items = Inventory.query.filter(Inventory.quantity <= Inventory.min_stock_level).count()
+    low_stock_items = Inventory.query.filter(inventory_stock_gap <= 0).count()
     out_of_stock_items = Inventory.query.filter(Inventory.quantity == 0).count()
 
     sample_items = Inventory.query.limit(5).all()
@@ -328,44 +1791,63 @@ def hr():
 @app.route('/hr/staff')
 def hr_staff():
     staff_list = Staff.query.all()
-    if not staff_list:
-        # Add 4 fictional staff with detailed info
-        staff_data = [
-            Staff(name="Alice Johnson", role="Store Manager", contact_info="alice.johnson@email.com, 555-1234", pay=65000, pay_type="Salary", address="123 Main St, Springfield", dob="1985-04-12", hire_date="2015-06-01"),
-            Staff(name="Bob Smith", role="Cashier", contact_info="bob.smith@email.com, 555-5678", pay=15.50, pay_type="Hourly", address="456 Oak Ave, Springfield", dob="1992-09-23", hire_date="2019-03-15"),
-            Staff(name="Clara Lee", role="Inventory Specialist", contact_info="clara.lee@email.com, 555-8765", pay=18.75, pay_type="Hourly", address="789 Pine Rd, Springfield", dob="1988-12-05", hire_date="2017-11-20"),
-            Staff(name="David Kim", role="Sales Associate", contact_info="david.kim@email.com, 555-4321", pay=32000, pay_type="Salary", address="321 Maple St, Springfield", dob="1995-07-30", hire_date="2021-01-10"),
-        ]
-        db.session.bulk_save_objects(staff_data)
-        db.session.commit()
-        staff_list = Staff.query.all()
     return render_template('hr/staff.html', staff=staff_list)
 
 @app.route('/hr/payroll')
 def hr_payroll():
-    payrolls = Payroll.query.order_by(Payroll.pay_date.desc()).all()
-    return render_template('hr/payroll.html', payrolls=payrolls)
+    page = keyset_paginate(Payroll.query.options(joinedload(Payroll.staff)), Payroll, Payroll.pay_date, descending=True, **page_args())
+    if wants_json():
+        return page_json(page)
+    return render_template('hr/payroll.html', payrolls=page.items, page=page, stats=payroll_summary())
+
+@app.route('/api/payroll/run', methods=['POST'])
+def payroll_run():
+    """Run payroll for {"start", "end"[, "pay_date", "pay_type"]}; repeating a period recalculates it"""
+    data = request.get_json()
+    try:
+        start = date.fromisoformat(data['start'])
+        end = date.fromisoformat(data['end'])
+        pay_date = date.fromisoformat(data['pay_date']) if data.get('pay_date') else None
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'start and end (and pay_date, if given) must be YYYY-MM-DD dates'})
+    if start > end:
+        return jsonify({'success': False, 'error': 'start must not be after end'})
+    if data.get('pay_type') not in (None, 'Hourly', 'Salary'):
+        return jsonify({'success': False, 'error': "pay_type must be 'Hourly' or 'Salary'"})
+
+    summary = commit_with_retry(lambda: run_payroll(start, end, pay_date, data.get('pay_type')))
+    return jsonify({'success': True, **summary})
 
 @app.route('/hr/timesheets')
 def hr_timesheets():
-    work_hours = WorkHour.query.order_by(WorkHour.date.desc()).all()
-    return render_template('hr/timesheets.html', work_hours=work_hours)
+    page = keyset_paginate(WorkHour.query.options(joinedload(WorkHour.staff)), WorkHour, WorkHour.date, descending=True, **page_args())
+    if wants_json():
+        return page_json(page)
+    return render_template('hr/timesheets.html', work_hours=page.items, page=page, stats=timesheet_summary())
+
+@app.route('/api/timesheets')
+def timesheets_api():
+    """Weekly hours and overtime, e.g. /api/timesheets?start=2025-01-06&end=2025-02-02&staff_id=3"""
+    today = date.today()
+    try:
+        start = date.fromisoformat(request.args.get('start') or (today - timedelta(weeks=app.config['TIMESHEET_WEEKS'] - 1)).isoformat())
+        end = date.fromisoformat(request.args.get('end') or today.isoformat())
+    except ValueError:
+        return jsonify({'success': False, 'error': 'start and end must be YYYY-MM-DD dates'})
+    if start > end:
+        return jsonify({'success': False, 'error': 'start must not be after end'})
+    return jsonify({'success': True, **timesheet_report(start, end, request.args.get('staff_id', type=int))})
 
 @app.route('/staff/<int:staff_id>')
 def staff_profile(staff_id):
     staff_member = Staff.query.get_or_404(staff_id)
     # Calculate current week (Monday-Sunday)
-    today = date.today()
-    start_of_week = today - timedelta(days=today.weekday())
-    end_of_week = start_of_week + timedelta(days=6)
-    week_hours = WorkHour.query.filter(
-        WorkHour.staff_id == staff_id,
-        WorkHour.date >= start_of_week,
-        WorkHour.date <= end_of_week
-    ).all()
+    start_of_week, end_of_week = week_range(date.today(), date.today())
+    weeks = timesheet_weeks(start_of_week, end_of_week, staff_id)
+    week = weeks[0] if weeks else None
     # Get all payroll records for this staff
     payrolls = Payroll.query.filter_by(staff_id=staff_id).order_by(Payroll.pay_date.desc()).all()
-    return render_template('staff_profile.html', staff=staff_member, week_hours=week_hours, start_of_week=start_of_week, end_of_week=end_of_week, payrolls=payrolls, timedelta=timedelta)
+    return render_template('staff_profile.html', staff=staff_member, week=week, start_of_week=start_of_week, end_of_week=end_of_week, payrolls=payrolls, timedelta=timedelta)
 
 # Order Schedule Module
 @app.route('/orders')
@@ -374,24 +1856,32 @@ def orders():
 
 @app.route('/orders/suppliers')
 def order_suppliers():
-    suppliers = Supplier.query.all()
-    return render_template('orders/suppliers.html', suppliers=suppliers)
+    page = keyset_paginate(Supplier.query, Supplier, **page_args())
+    if wants_json():
+        return page_json(page)
+    return render_template('orders/suppliers.html', suppliers=page.items, page=page)
 
 @app.route('/orders/prices')
 def order_prices():
-    price_lists = PriceList.query.all()
-    return render_template('orders/prices.html', price_lists=price_lists)
+    page = keyset_paginate(PriceList.query.options(joinedload(PriceList.inventory), joinedload(PriceList.supplier)), PriceList, **page_args())
+    if wants_json():
+        return page_json(page)
+    return render_template('orders/prices.html', price_lists=page.items, page=page)
 
 @app.route('/orders/contracts')
 def order_contracts():
-    contracts = Contract.query.all()
-    return render_template('orders/contracts.html', contracts=contracts)
+    page = keyset_paginate(Contract.query.options(joinedload(Contract.supplier)), Contract, **page_args())
+    if wants_json():
+        return page_json(page)
+    return render_template('orders/contracts.html', contracts=page.items, page=page)
 
 # Supplier Management Module
 @app.route('/suppliers')
 def suppliers():
-    suppliers = Supplier.query.all()
-    return render_template('suppliers/index.html', suppliers=suppliers)
+    page = keyset_paginate(Supplier.query, Supplier, **page_args())
+    if wants_json():
+        return page_json(page)
+    return render_template('suppliers/index.html', suppliers=page.items, page=page)
 
 # Revenue Management Module
 @app.route('/revenue')
@@ -400,201 +1890,55 @@ def revenue():
 
 @app.route('/revenue/margin')
 def revenue_margin():
-    # Calculate margins for all inventory items
-    inventory_items = Inventory.query.all()
-    margins = []
-    for item in inventory_items:
-        if item.price > 0 and item.cost_price > 0:
-            margin = ((item.price - item.cost_price) / item.price) * 100
-            margins.append({
-                'item': item,
-                'margin_percentage': round(margin, 2),
-                'margin_amount': round(item.price - item.cost_price, 2)
-            })
-    return render_template('revenue/margin.html', margins=margins)
+    # Margins are computed and sorted in SQL; only one page of items is loaded
+    sort = request.args.get('sort', 'margin')
+    if sort not in MARGIN_SORTS:
+        sort = 'margin'
+    descending = request.args.get('order', 'desc') != 'asc'
+    page = keyset_paginate(Inventory.query.filter(margin_filter), Inventory, MARGIN_SORTS[sort],
+                           descending=descending, **page_args())
+    margins = [margin_row(item) for item in page.items]
+
+    if wants_json():
+        return jsonify({
+            'items': [
+                dict(serialize_row(margin['item']), margin_percentage=margin['margin_percentage'],
+                     margin_amount=margin['margin_amount'])
+                for margin in margins
+            ],
+            'next_cursor': page.next_cursor,
+            'prev_cursor': page.prev_cursor,
+            'limit': page.limit,
+            'summary': margin_summary()
+        })
+    return render_template('revenue/margin.html', margins=margins, page=page, sort=sort, descending=descending,
+                           stats=margin_summary(), top_margins=ranked_margins(True, 5),
+                           low_margins=ranked_margins(False, 10))
 
 @app.route('/revenue/reports')
 def revenue_reports():
-    sales = Sale.query.order_by(Sale.date.desc()).all()
-    return render_template('revenue/reports.html', sales=sales)
+    sales_query = Sale.query.options(
+        joinedload(Sale.order).joinedload(Order.staff),
+        joinedload(Sale.order).undefer(Order.item_count)
+    )
+    page = keyset_paginate(sales_query, Sale, sale_sort_date, descending=True, **page_args())
+    if wants_json():
+        return page_json(page)
+    return render_template('revenue/reports.html', sales=page.items, page=page, stats=sales_summary(),
+                           monthly_revenue=monthly_revenue(), sales_trend=daily_revenue(), top_staff=staff_revenue())
 
 if __name__ == '__main__':
-    # Check if database exists and has correct schema
-    db_exists = os.path.exists('instance/holistic_retail.db')
-    schema_valid = False
-
-    if db_exists:
-        schema_valid = check_and_fix_database_schema()
-
-    # If database doesn't exist or schema is invalid, recreate it
-    if not db_exists or not schema_valid:
-        db_removed = False
-        if db_exists:
-            print("Removing old database file...")
-            try:
-                os.remove('instance/holistic_retail.db')
-                db_removed = True
-            except PermissionError:
-                print("Warning: Could not remove database file (it may be in use).")
-                print("Attempting to add missing columns to existing database...")
-                if add_missing_columns():
-                    schema_valid = True
-                else:
-                    print("Please stop any running Flask instances and restart the application.")
-                    print("The application will continue with the existing database.")
-                    schema_valid = True  # Force it to continue with existing DB
-            except Exception as e:
-                print(f"Error removing database file: {e}")
-                print("Attempting to add missing columns to existing database...")
-                if add_missing_columns():
-                    schema_valid = True
-                else:
-                    schema_valid = True  # Force it to continue with existing DB
-
-        # Only create new database if we successfully removed the old one or it didn't exist
-        if not db_exists or (db_removed and schema_valid == False):
-            if recreate_database():
-                print("Database recreated successfully!")
-            else:
-                print("Failed to recreate database. Continuing with existing database.")
-                schema_valid = True
-
-            # Add sample data within app context
-            with app.app_context():
-                # Add sample suppliers only if table is empty
-                supplier_count = Supplier.query.count()
-                if supplier_count == 0:
-                    try:
-                        suppliers_data = [
-                            Supplier(name="Coca-Cola Company", contact_info="1-800-GET-COKE", email="orders@coca-cola.com", phone="1-800-438-2653", address="1 Coca-Cola Plaza, Atlanta, GA 30313"),
-                            Supplier(name="PepsiCo", contact_info="1-800-433-2652", email="orders@pepsico.com", phone="1-800-433-2652", address="700 Anderson Hill Road, Purchase, NY 10577"),
-                            Supplier(name="Nestlé", contact_info="1-800-387-4636", email="orders@nestle.com", phone="1-800-387-4636", address="800 N Brand Blvd, Glendale, CA 91203"),
-                            Supplier(name="Kraft Heinz", contact_info="1-800-323-0768", email="orders@kraftheinz.com", phone="1-800-323-0768", address="200 E Randolph St, Chicago, IL 60601"),
-                            Supplier(name="General Mills", contact_info="1-800-328-1140", email="orders@generalmills.com", phone="1-800-328-1140", address="Number One General Mills Blvd, Minneapolis, MN 55426")
-                        ]
-                        db.session.bulk_save_objects(suppliers_data)
-                        db.session.commit()
-                        print("Sample suppliers added successfully!")
-                    except Exception as e:
-                        print(f"Error adding sample suppliers: {e}")
-                        db.session.rollback()
-                else:
-                    print(f"Supplier table already has {supplier_count} records. Skipping sample data.")
-
-                # Add sample inventory items only if table is empty
-                inventory_count = Inventory.query.count()
-                if inventory_count == 0:
-                    try:
-                        inventory_data = [
-                            # Soft Drinks
-                            Inventory(name="Coca-Cola Classic 12oz Can", barcode="049000006000", quantity=150, price=1.99, cost_price=0.80, supplier_id=1, department="Beverages", unit_of_measure="pcs", min_stock_level=50),
-                            Inventory(name="Pepsi Cola 12oz Can", barcode="012000001000", quantity=120, price=1.89, cost_price=0.75, supplier_id=2, department="Beverages", unit_of_measure="pcs", min_stock_level=40),
-                            Inventory(name="Sprite 12oz Can", barcode="049000006001", quantity=80, price=1.99, cost_price=0.80, supplier_id=1, department="Beverages", unit_of_measure="pcs", min_stock_level=30),
-                            Inventory(name="Mountain Dew 12oz Can", barcode="012000001001", quantity=95, price=1.89, cost_price=0.75, supplier_id=2, department="Beverages", unit_of_measure="pcs", min_stock_level=35),
-
-                            # Tobacco Products
-                            Inventory(name="Marlboro Red 20pk", barcode="012000000123", quantity=45, price=8.99, cost_price=6.50, supplier_id=3, department="Tobacco", unit_of_measure="pcs", min_stock_level=20),
-                            Inventory(name="Du Maurier King Size 20pk", barcode="012000000124", quantity=38, price=9.49, cost_price=7.00, supplier_id=3, department="Tobacco", unit_of_measure="pcs", min_stock_level=15),
-                            Inventory(name="Camel Blue 20pk", barcode="012000000125", quantity=52, price=8.79, cost_price=6.30, supplier_id=3, department="Tobacco", unit_of_measure="pcs", min_stock_level=25),
-
-                            # Lottery Tickets
-                            Inventory(name="OLG Lotto 6/49", barcode="012000000200", quantity=200, price=3.00, cost_price=2.10, supplier_id=4, department="Lottery", unit_of_measure="pcs", min_stock_level=100),
-                            Inventory(name="OLG Lotto Max", barcode="012000000201", quantity=180, price=5.00, cost_price=3.50, supplier_id=4, department="Lottery", unit_of_measure="pcs", min_stock_level=90),
-                            Inventory(name="OLG Daily Grand", barcode="012000000202", quantity=150, price=3.00, cost_price=2.10, supplier_id=4, department="Lottery", unit_of_measure="pcs", min_stock_level=75),
-
-                            # Snacks
-                            Inventory(name="Doritos Nacho Cheese 9oz", barcode="028400090000", quantity=75, price=4.49, cost_price=2.80, supplier_id=2, department="Snacks", unit_of_measure="pcs", min_stock_level=30),
-                            Inventory(name="Lay's Classic Potato Chips 8oz", barcode="028400090001", quantity=60, price=4.29, cost_price=2.70, supplier_id=2, department="Snacks", unit_of_measure="pcs", min_stock_level=25),
-                            Inventory(name="Cheetos Crunchy 8.5oz", barcode="028400090002", quantity=85, price=4.49, cost_price=2.80, supplier_id=2, department="Snacks", unit_of_measure="pcs", min_stock_level=35),
-
-                            # Candy
-                            Inventory(name="Snickers Bar 2.07oz", barcode="040000000000", quantity=120, price=1.49, cost_price=0.90, supplier_id=1, department="Candy", unit_of_measure="pcs", min_stock_level=50),
-                            Inventory(name="M&M's Milk Chocolate 1.69oz", barcode="040000000001", quantity=95, price=1.29, cost_price=0.80, supplier_id=1, department="Candy", unit_of_measure="pcs", min_stock_level=40),
-                            Inventory(name="KitKat 4-Finger Bar 1.5oz", barcode="040000000002", quantity=110, price=1.39, cost_price=0.85, supplier_id=1, department="Candy", unit_of_measure="pcs", min_stock_level=45),
-
-                            # Low Stock Items (for testing alerts)
-                            Inventory(name="Rare Energy Drink", barcode="012000000999", quantity=5, price=2.99, cost_price=1.50, supplier_id=5, department="Beverages", unit_of_measure="pcs", min_stock_level=10),
-                            Inventory(name="Limited Edition Chips", barcode="012000000998", quantity=3, price=5.99, cost_price=3.00, supplier_id=5, department="Snacks", unit_of_measure="pcs", min_stock_level=15),
-                        ]
-                        db.session.bulk_save_objects(inventory_data)
-                        db.session.commit()
-                        print("Sample inventory data added successfully!")
-                    except Exception as e:
-                        print(f"Error adding sample inventory data: {e}")
-                        db.session.rollback()
-                else:
-                    print(f"Inventory table already has {inventory_count} records. Skipping sample data.")
-
-                print("Database initialization completed!")
-    else:
-        # Database exists and schema is valid, check if we need to add sample data
-        with app.app_context():
-            try:
-                # Check if inventory table is empty
-                inventory_count = Inventory.query.count()
-                if inventory_count == 0:
-                    print("Adding sample inventory data...")
-
-                    # Check if suppliers exist, if not add them
-                    supplier_count = Supplier.query.count()
-                    if supplier_count == 0:
-                        try:
-                            suppliers_data = [
-                                Supplier(name="Coca-Cola Company", contact_info="1-800-GET-COKE", email="orders@coca-cola.com", phone="1-800-438-2653", address="1 Coca-Cola Plaza, Atlanta, GA 30313"),
-                                Supplier(name="PepsiCo", contact_info="1-800-433-2652", email="orders@pepsico.com", phone="1-800-433-2652", address="700 Anderson Hill Road, Purchase, NY 10577"),
-                                Supplier(name="Nestlé", contact_info="1-800-387-4636", email="orders@nestle.com", phone="1-800-387-4636", address="800 N Brand Blvd, Glendale, CA 91203"),
-                                Supplier(name="Kraft Heinz", contact_info="1-800-323-0768", email="orders@kraftheinz.com", phone="1-800-323-0768", address="200 E Randolph St, Chicago, IL 60601"),
-                                Supplier(name="General Mills", contact_info="1-800-328-1140", email="orders@generalmills.com", phone="1-800-328-1140", address="Number One General Mills Blvd, Minneapolis, MN 55426")
-                            ]
-                            db.session.bulk_save_objects(suppliers_data)
-                            db.session.commit()
-                            print("Sample suppliers added successfully!")
-                        except Exception as e:
-                            print(f"Error adding sample suppliers: {e}")
-                            db.session.rollback()
-
-                    # Add sample inventory items
-                    try:
-                        inventory_data = [
-                            # Soft Drinks
-                            Inventory(name="Coca-Cola Classic 12oz Can", barcode="049000006000", quantity=150, price=1.99, cost_price=0.80, supplier_id=1, department="Beverages", unit_of_measure="pcs", min_stock_level=50),
-                            Inventory(name="Pepsi Cola 12oz Can", barcode="012000001000", quantity=120, price=1.89, cost_price=0.75, supplier_id=2, department="Beverages", unit_of_measure="pcs", min_stock_level=40),
-                            Inventory(name="Sprite 12oz Can", barcode="049000006001", quantity=80, price=1.99, cost_price=0.80, supplier_id=1, department="Beverages", unit_of_measure="pcs", min_stock_level=30),
-                            Inventory(name="Mountain Dew 12oz Can", barcode="012000001001", quantity=95, price=1.89, cost_price=0.75, supplier_id=2, department="Beverages", unit_of_measure="pcs", min_stock_level=35),
-
-                            # Tobacco Products
-                            Inventory(name="Marlboro Red 20pk", barcode="012000000123", quantity=45, price=8.99, cost_price=6.50, supplier_id=3, department="Tobacco", unit_of_measure="pcs", min_stock_level=20),
-                            Inventory(name="Du Maurier King Size 20pk", barcode="012000000124", quantity=38, price=9.49, cost_price=7.00, supplier_id=3, department="Tobacco", unit_of_measure="pcs", min_stock_level=15),
-                            Inventory(name="Camel Blue 20pk", barcode="012000000125", quantity=52, price=8.79, cost_price=6.30, supplier_id=3, department="Tobacco", unit_of_measure="pcs", min_stock_level=25),
-
-                            # Lottery Tickets
-                            Inventory(name="OLG Lotto 6/49", barcode="012000000200", quantity=200, price=3.00, cost_price=2.10, supplier_id=4, department="Lottery", unit_of_measure="pcs", min_stock_level=100),
-                            Inventory(name="OLG Lotto Max", barcode="012000000201", quantity=180, price=5.00, cost_price=3.50, supplier_id=4, department="Lottery", unit_of_measure="pcs", min_stock_level=90),
-                            Inventory(name="OLG Daily Grand", barcode="012000000202", quantity=150, price=3.00, cost_price=2.10, supplier_id=4, department="Lottery", unit_of_measure="pcs", min_stock_level=75),
-
-                            # Snacks
-                            Inventory(name="Doritos Nacho Cheese 9oz", barcode="028400090000", quantity=75, price=4.49, cost_price=2.80, supplier_id=2, department="Snacks", unit_of_measure="pcs", min_stock_level=30),
-                            Inventory(name="Lay's Classic Potato Chips 8oz", barcode="028400090001", quantity=60, price=4.29, cost_price=2.70, supplier_id=2, department="Snacks", unit_of_measure="pcs", min_stock_level=25),
-                            Inventory(name="Cheetos Crunchy 8.5oz", barcode="028400090002", quantity=85, price=4.49, cost_price=2.80, supplier_id=2, department="Snacks", unit_of_measure="pcs", min_stock_level=35),
-
-                            # Candy
-                            Inventory(name="Snickers Bar 2.07oz", barcode="040000000000", quantity=120, price=1.49, cost_price=0.90, supplier_id=1, department="Candy", unit_of_measure="pcs", min_stock_level=50),
-                            Inventory(name="M&M's Milk Chocolate 1.69oz", barcode="040000000001", quantity=95, price=1.29, cost_price=0.80, supplier_id=1, department="Candy", unit_of_measure="pcs", min_stock_level=40),
-                            Inventory(name="KitKat 4-Finger Bar 1.5oz", barcode="040000000002", quantity=110, price=1.39, cost_price=0.85, supplier_id=1, department="Candy", unit_of_measure="pcs", min_stock_level=45),
-
-                            # Low Stock Items (for testing alerts)
-                            Inventory(name="Rare Energy Drink", barcode="012000000999", quantity=5, price=2.99, cost_price=1.50, supplier_id=5, department="Beverages", unit_of_measure="pcs", min_stock_level=10),
-                            Inventory(name="Limited Edition Chips", barcode="012000000998", quantity=3, price=5.99, cost_price=3.00, supplier_id=5, department="Snacks", unit_of_measure="pcs", min_stock_level=15),
-                        ]
-                        db.session.bulk_save_objects(inventory_data)
-                        db.session.commit()
-                        print("Sample inventory data added successfully!")
-                    except Exception as e:
-                        print(f"Error adding sample inventory data: {e}")
-                        db.session.rollback()
-                else:
-                    print(f"Database already contains {inventory_count} inventory items. Skipping sample data.")
-            except Exception as e:
-                print(f"Error checking database: {e}")
+    # Bring the schema up to date; never drops or recreates existing data
+    with app.app_context():
+        print(f"Database schema at version {run_migrations()}.")
+
+    # Add sample data to any table that is still empty
+    with app.app_context():
+        for name, count in load_fixtures(FIXTURES_DIR, only_empty=True).items():
+            print(f"Loaded {count} sample {name} rows.")
+
+    # Warm the barcode index before the first scan arrives
+    with app.app_context():
+        print(f"Barcode index loaded with {build_barcode_index()} items.")
 
     app.run(debug=True)
@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Holistic Retail Solution
+
+Each scenario runs the Flask app in-process against a scratch SQLite
+database, so nothing touches instance/holistic_retail.db.
+
+    python benchmark.py hot-sku --writers 32 --updates 50
+    python benchmark.py sqlite-profile --items 2000 --seconds 5
+    python benchmark.py load --skus 10000 --clients 8 --output results.json
+    python benchmark.py load --http --mix scan=90,update=10
+    python benchmark.py checkout --clients 8 --cart-size 10
+    python benchmark.py compare before.json after.json
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Point the app at a scratch database before it is imported
+SCRATCH_DIR = tempfile.mkdtemp(prefix="holistic-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(SCRATCH_DIR, 'bench.db')}")
+
+from sqlalchemy import event, func, insert, select, update  # noqa: E402
+from werkzeug.serving import WSGIRequestHandler, make_server  # noqa: E402
+
+from app import (app, db, build_barcode_index, percentile, Inventory, Order,  # noqa: E402
+                 OrderItem, Sale, Staff, Supplier)
+
+
+def reset_database():
+    """Delete the scratch database file and create a fresh schema"""
+    with app.app_context():
+        db.engine.dispose()
+        path = db.engine.url.database
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        db.create_all()
+
+
+def run_threads(count, target):
+    """Start count threads running target(index) and wait for all of them"""
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(count)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def bench_hot_sku(args):
+    """Many concurrent writers adjusting the quantity of one SKU"""
+    reset_database()
+    with app.app_context():
+        supplier = Supplier(name="Bench Supplier")
+        db.session.add(supplier)
+        db.session.flush()
+        item = Inventory(name="Hot SKU", barcode="000000000001", quantity=args.start_quantity,
+                         price=1.99, cost_price=0.80, supplier_id=supplier.id)
+        db.session.add(item)
+        db.session.commit()
+        item_id = item.id
+
+    failures = []
+
+    def writer(index):
+        client = app.test_client()
+        for _ in range(args.updates):
+            response = client.post("/api/inventory/update-quantity",
+                                   json={"item_id": item_id, "quantity_change": 1})
+            if response.status_code != 200 or not response.get_json().get("success"):
+                failures.append(response.status_code)
+
+    elapsed = run_threads(args.writers, writer)
+
+    with app.app_context():
+        final_quantity = db.session.get(Inventory, item_id).quantity
+
+    total_updates = args.writers * args.updates
+    expected = args.start_quantity + total_updates - len(failures)
+    print(f"Hot SKU: {args.writers} writers x {args.updates} updates")
+    print(f"   Elapsed: {elapsed:.2f}s")
+    print(f"   Throughput: {total_updates / elapsed:,.0f} updates/s")
+    print(f"   Failed requests: {len(failures)}")
+    print(f"   Final quantity: {final_quantity} (expected {expected})")
+    if final_quantity == expected and not failures:
+        print("✅ No lost updates")
+        return True
+    print(f"❌ Lost {expected - final_quantity} updates")
+    return False
+
+
+def seed_inventory(count):
+    """Insert count inventory items under one supplier and return their ids"""
+    with app.app_context():
+        supplier = Supplier(name="Bench Supplier")
+        db.session.add(supplier)
+        db.session.flush()
+        items = [
+            Inventory(name=f"Bench Item {index}", barcode=f"{index:012d}", quantity=100,
+                      price=2.49, cost_price=1.10, supplier_id=supplier.id,
+                      department="Bench", unit_of_measure="pcs", min_stock_level=10)
+            for index in range(count)
+        ]
+        db.session.add_all(items)
+        db.session.commit()
+        return [item.id for item in items]
+
+
+def measure_reads_under_writes(args):
+    """Count report page reads and scan writes completed in a fixed window"""
+    reset_database()
+    item_ids = seed_inventory(args.items)
+    stop = threading.Event()
+    reads, writes, errors = [0] * args.readers, [0] * args.writers, []
+
+    def reader(index):
+        client = app.test_client()
+        while not stop.is_set():
+            response = client.get("/inventory/reports")
+            if response.status_code == 200:
+                reads[index] += 1
+            else:
+                errors.append(response.status_code)
+
+    def writer(index):
+        client = app.test_client()
+        position = index
+        while not stop.is_set():
+            response = client.post("/api/inventory/update-quantity",
+                                   json={"item_id": item_ids[position % len(item_ids)], "quantity_change": -1})
+            if response.status_code == 200:
+                writes[index] += 1
+            else:
+                errors.append(response.status_code)
+            position += args.writers
+
+    threads = [threading.Thread(target=reader, args=(index,)) for index in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(index,)) for index in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        journal_mode = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+    return {
+        "journal_mode": journal_mode,
+        "reads_per_second": sum(reads) / args.seconds,
+        "writes_per_second": sum(writes) / args.seconds,
+        "errors": len(errors),
+    }
+
+
+def bench_sqlite_profile(args):
+    """Report page throughput during scan writes, with and without the SQLite profile"""
+    results = {}
+    for enabled in (False, True):
+        app.config["SQLITE_PROFILE_ENABLED"] = enabled
+        results[enabled] = measure_reads_under_writes(args)
+
+    print(f"/inventory/reports with {args.readers} readers, {args.writers} writers, {args.items} items, {args.seconds}s each")
+    for enabled, label in ((False, "Default pragmas"), (True, "Production profile")):
+        result = results[enabled]
+        print(f"   {label} (journal_mode={result['journal_mode']}): "
+              f"{result['reads_per_second']:,.1f} reads/s, "
+              f"{result['writes_per_second']:,.1f} writes/s, "
+              f"{result['errors']} errors")
+    baseline = results[False]["reads_per_second"]
+    if baseline:
+        print(f"   Read speedup: {results[True]['reads_per_second'] / baseline:.2f}x")
+    return not any(result["errors"] for result in results.values())
+
+
+def generate_data(skus, staff, sales, seed=0):
+    """Fill a fresh scratch database with skus items, staff members and sales, then index barcodes
+
+    Ids start at 1, so item ids are 1..skus and barcode i-1 belongs to item i.
+    """
+    rng = random.Random(seed)
+    supplier_count = max(1, skus // 100)
+    started = datetime(2025, 1, 1)
+    prices = [round(rng.uniform(0.5, 25.0), 2) for _ in range(skus)]
+    items = [
+        {"name": f"Bench Item {index}", "barcode": f"{index:012d}", "quantity": rng.randint(0, 500),
+         "price": prices[index], "cost_price": round(prices[index] * rng.uniform(0.4, 0.9), 2),
+         "supplier_id": index % supplier_count + 1, "department": f"Department {index % 12}",
+         "unit_of_measure": "pcs", "min_stock_level": 10}
+        for index in range(skus)
+    ]
+    orders, order_items, sale_rows = [], [], []
+    for order_id in range(1, sales + 1):
+        when = started + timedelta(minutes=rng.randrange(365 * 24 * 60))
+        total = 0.0
+        for _ in range(rng.randint(1, 4)):
+            item_id, quantity = rng.randint(1, skus), rng.randint(1, 3)
+            order_items.append({"order_id": order_id, "inventory_id": item_id, "quantity": quantity,
+                                "price": prices[item_id - 1]})
+            total += prices[item_id - 1] * quantity
+        orders.append({"date": when, "staff_id": rng.randint(1, staff)})
+        sale_rows.append({"order_id": order_id, "total": round(total, 2), "date": when})
+
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(insert(Supplier), [{"name": f"Supplier {index}"} for index in range(supplier_count)])
+            connection.execute(insert(Inventory), items)
+            connection.execute(insert(Staff), [
+                {"name": f"Staff {index}", "role": "Cashier", "pay": 15.0, "pay_type": "Hourly"}
+                for index in range(staff)
+            ])
+            if sales:
+                connection.execute(insert(Order), orders)
+                connection.execute(insert(OrderItem), order_items)
+                connection.execute(insert(Sale), sale_rows)
+        build_barcode_index()
+
+
+# Load workloads: each builds the (path, JSON body) of one request
+new_barcodes = itertools.count(1)
+
+def scan_request(rng, args):
+    return "/api/inventory/scan", {"barcode": f"{rng.randrange(args.skus):012d}"}
+
+def add_request(rng, args):
+    index = next(new_barcodes)
+    return "/api/inventory/add", {"name": f"Load Item {index}", "barcode": f"9{index:011d}",
+                                  "supplier_id": "Load Supplier", "price": "4.99", "cost_price": "2.50",
+                                  "quantity": "10"}
+
+def update_request(rng, args):
+    return "/api/inventory/update-quantity", {"item_id": rng.randint(1, args.skus),
+                                              "quantity_change": rng.choice((-1, 1))}
+
+def bulk_update_request(rng, args):
+    return "/api/inventory/bulk-update", {"items": [
+        {"id": rng.randint(1, args.skus), "quantity_change": -1} for _ in range(args.bulk_size)
+    ]}
+
+def checkout_request(rng, args):
+    return "/api/checkout", {"items": [
+        {"barcode": f"{rng.randrange(args.skus):012d}", "quantity": rng.randint(1, 3)} for _ in range(args.cart_size)
+    ]}
+
+WORKLOADS = {
+    "scan": scan_request,
+    "add": add_request,
+    "update": update_request,
+    "bulk-update": bulk_update_request,
+    "checkout": checkout_request,
+}
+
+
+class InProcessClient:
+    """Calls the WSGI app directly through Flask's test client"""
+
+    def __init__(self):
+        self.client = app.test_client()
+
+    def post(self, path, payload):
+        response = self.client.post(path, json=payload)
+        return response.status_code, response.get_json(silent=True)
+
+    def close(self):
+        pass
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Keep-alive request handler that does not log every request"""
+    protocol_version = "HTTP/1.1"
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class HttpClient:
+    """Keeps one HTTP connection to the local test server"""
+
+    def __init__(self, port):
+        self.connection = http.client.HTTPConnection("127.0.0.1", port)
+
+    def post(self, path, payload):
+        self.connection.request("POST", path, body=json.dumps(payload), headers={"Content-Type": "application/json"})
+        response = self.connection.getresponse()
+        body = response.read()
+        try:
+            return response.status, json.loads(body)
+        except ValueError:
+            return response.status, None
+
+    def close(self):
+        self.connection.close()
+
+
+def parse_mix(text):
+    """Parse "scan=70,update=20" into {"scan": 70.0, "update": 20.0}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in WORKLOADS:
+            raise argparse.ArgumentTypeError(f"unknown workload {name!r} (choose from {', '.join(WORKLOADS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def latency_stats(latencies, errors, elapsed):
+    """Count, error count, p50/p95/p99/mean in milliseconds and throughput of one workload"""
+    stats = {"count": len(latencies), "errors": errors, "throughput": len(latencies) / elapsed}
+    if latencies:
+        stats.update({f"p{int(fraction * 100)}_ms": percentile(latencies, fraction) * 1000
+                      for fraction in (0.5, 0.95, 0.99)})
+        stats["mean_ms"] = sum(latencies) / len(latencies) * 1000
+    return stats
+
+
+def git_commit():
+    """Short hash of the checked-out commit, or None outside a git checkout"""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def bench_load(args):
+    """Concurrent clients running a weighted mix of scan/add/update/bulk-update requests"""
+    reset_database()
+    started = time.perf_counter()
+    generate_data(args.skus, args.staff, args.sales, seed=args.seed)
+    print(f"Generated {args.skus:,} SKUs, {args.staff:,} staff, {args.sales:,} sales "
+          f"in {time.perf_counter() - started:.2f}s")
+
+    server = None
+    if args.http:
+        server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    names, weights = list(args.mix), list(args.mix.values())
+    latencies = [{name: [] for name in names} for _ in range(args.clients)]
+    errors = [{name: 0 for name in names} for _ in range(args.clients)]
+
+    def client(index):
+        rng = random.Random(args.seed + index)
+        connection = HttpClient(server.server_port) if server else InProcessClient()
+        try:
+            for name in rng.choices(names, weights, k=args.requests):
+                path, payload = WORKLOADS[name](rng, args)
+                sent = time.perf_counter()
+                status, body = connection.post(path, payload)
+                latencies[index][name].append(time.perf_counter() - sent)
+                if status != 200 or body is None or body.get("success") is False:
+                    errors[index][name] += 1
+        finally:
+            connection.close()
+
+    try:
+        elapsed = run_threads(args.clients, client)
+    finally:
+        if server:
+            server.shutdown()
+
+    operations = {
+        name: latency_stats([value for per_client in latencies for value in per_client[name]],
+                            sum(per_client[name] for per_client in errors), elapsed)
+        for name in names
+    }
+    operations["all"] = latency_stats([value for per_client in latencies for values in per_client.values()
+                                       for value in values],
+                                      sum(sum(per_client.values()) for per_client in errors), elapsed)
+
+    transport = "HTTP" if args.http else "in-process"
+    print(f"Load: {args.clients} clients x {args.requests} requests ({transport}), {elapsed:.2f}s")
+    print(f"   {'workload':<12} {'count':>7} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>9}")
+    for name, stats in operations.items():
+        print(f"   {name:<12} {stats['count']:>7,} {stats['errors']:>7,} {stats.get('p50_ms', 0):>8.2f} "
+              f"{stats.get('p95_ms', 0):>8.2f} {stats.get('p99_ms', 0):>8.2f} {stats['throughput']:>9,.0f}")
+
+    if args.output:
+        settings = {key: value for key, value in vars(args).items() if key not in ("run", "output")}
+        with open(args.output, "w") as handle:
+            json.dump({
+                "scenario": "load",
+                "commit": git_commit(),
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "settings": settings,
+                "elapsed": elapsed,
+                "operations": operations,
+            }, handle, indent=2)
+        print(f"   Results saved to {args.output}")
+    return operations["all"]["errors"] == 0
+
+
+def bench_checkout(args):
+    """Concurrent registers checking out carts, with statement counts and a stock reconciliation"""
+    reset_database()
+    generate_data(args.skus, staff=1, sales=0, seed=args.seed)
+    # Plenty of stock so no decrement is clamped at zero and the totals reconcile
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(update(Inventory).values(quantity=args.start_quantity))
+        engine = db.engine
+
+    statements = [0]
+
+    def count_statement(*_):
+        statements[0] += 1
+
+    latencies = [[] for _ in range(args.clients)]
+    failures = []
+
+    def register(index):
+        rng = random.Random(args.seed + index)
+        client = InProcessClient()
+        for _ in range(args.checkouts):
+            path, payload = checkout_request(rng, args)
+            sent = time.perf_counter()
+            status, body = client.post(path, payload)
+            latencies[index].append(time.perf_counter() - sent)
+            if status != 200 or not body or not body.get("success"):
+                failures.append(body)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        elapsed = run_threads(args.clients, register)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    with app.app_context():
+        sales = db.session.scalar(select(func.count(Sale.id)))
+        sold = db.session.scalar(select(func.coalesce(func.sum(OrderItem.quantity), 0)))
+        stock = db.session.scalar(select(func.sum(Inventory.quantity)))
+
+    checkouts = args.clients * args.checkouts
+    stats = latency_stats([value for per_client in latencies for value in per_client], len(failures), elapsed)
+    expected_stock = args.skus * args.start_quantity - sold
+    print(f"Checkout: {args.clients} registers x {args.checkouts} carts of {args.cart_size} lines, {elapsed:.2f}s")
+    print(f"   Throughput: {stats['throughput']:,.0f} checkouts/s")
+    print(f"   Latency: p50 {stats['p50_ms']:.2f}ms, p95 {stats['p95_ms']:.2f}ms, p99 {stats['p99_ms']:.2f}ms")
+    print(f"   Statements per checkout: {statements[0] / checkouts:.1f}")
+    print(f"   Failed checkouts: {len(failures)}")
+    print(f"   Sales recorded: {sales:,} (expected {checkouts - len(failures):,})")
+    print(f"   Stock left: {stock:,} (expected {expected_stock:,})")
+    if not failures and sales == checkouts and stock == expected_stock:
+        print("✅ Every checkout recorded and stock reconciles")
+        return True
+    print("❌ Checkouts and stock do not reconcile")
+    return False
+
+
+def bench_compare(args):
+    """Print the latency and throughput change of every workload between two saved load runs"""
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    with open(args.candidate) as handle:
+        candidate = json.load(handle)
+
+    print(f"{baseline.get('commit') or args.baseline} -> {candidate.get('commit') or args.candidate}")
+    for name, after in candidate["operations"].items():
+        before = baseline["operations"].get(name)
+        if not before:
+            continue
+        changes = []
+        for key, label in (("p50_ms", "p50"), ("p95_ms", "p95"), ("p99_ms", "p99"), ("throughput", "req/s")):
+            if before.get(key) and key in after:
+                changes.append(f"{label} {before[key]:,.2f} -> {after[key]:,.2f} "
+                               f"({(after[key] - before[key]) / before[key]:+.0%})")
+        print(f"   {name:<12} " + ", ".join(changes))
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="scenario", required=True)
+
+    hot_sku = subparsers.add_parser("hot-sku", help="concurrent quantity updates against one SKU")
+    hot_sku.add_argument("--writers", type=int, default=32)
+    hot_sku.add_argument("--updates", type=int, default=50, help="updates per writer")
+    hot_sku.add_argument("--start-quantity", type=int, default=0)
+    hot_sku.set_defaults(run=bench_hot_sku)
+
+    sqlite_profile = subparsers.add_parser("sqlite-profile", help="report reads during scan writes, profile off vs on")
+    sqlite_profile.add_argument("--items", type=int, default=2000)
+    sqlite_profile.add_argument("--readers", type=int, default=4)
+    sqlite_profile.add_argument("--writers", type=int, default=4)
+    sqlite_profile.add_argument("--seconds", type=float, default=5)
+    sqlite_profile.set_defaults(run=bench_sqlite_profile)
+
+    load = subparsers.add_parser("load", help="concurrent scan/add/update/bulk-update clients with latency percentiles")
+    load.add_argument("--skus", type=int, default=10000)
+    load.add_argument("--staff", type=int, default=50)
+    load.add_argument("--sales", type=int, default=20000)
+    load.add_argument("--clients", type=int, default=8)
+    load.add_argument("--requests", type=int, default=500, help="requests per client")
+    load.add_argument("--mix", type=parse_mix, default=parse_mix("scan=70,update=20,bulk-update=5,add=5"),
+                      help="weighted workloads, e.g. scan=70,update=20,bulk-update=5,add=5,checkout=10")
+    load.add_argument("--bulk-size", type=int, default=20, help="items per bulk-update request")
+    load.add_argument("--cart-size", type=int, default=10, help="lines per checkout request")
+    load.add_argument("--seed", type=int, default=0)
+    load.add_argument("--http", action="store_true", help="go through a local threaded HTTP server instead of calling the app in-process")
+    load.add_argument("--output", help="save results as JSON to this path")
+    load.set_defaults(run=bench_load)
+
+    checkout = subparsers.add_parser("checkout", help="concurrent /api/checkout carts, checkouts per second")
+    checkout.add_argument("--skus", type=int, default=10000)
+    checkout.add_argument("--clients", type=int, default=8)
+    checkout.add_argument("--checkouts", type=int, default=200, help="checkouts per client")
+    checkout.add_argument("--cart-size", type=int, default=10, help="lines per cart")
+    checkout.add_argument("--start-quantity", type=int, default=100000)
+    checkout.add_argument("--seed", type=int, default=0)
+    checkout.set_defaults(run=bench_checkout)
+
+    compare = subparsers.add_parser("compare", help="compare two JSON results saved by load --output")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.set_defaults(run=bench_compare)
+
+    args = parser.parse_args()
+    sys.exit(0 if args.run(args) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Blank-cell checks for the Holistic Retail Solution inventory CSV import
+
+Imports a catalog into a scratch SQLite database, then re-imports the same
+barcodes with blank cells. A blank cell must keep the stored value, including
+required columns such as price, and new rows must still get column defaults.
+"""
+
+import io
+import os
+import sys
+import tempfile
+
+# Point the app at a scratch database before it is imported
+SCRATCH_DIR = tempfile.mkdtemp(prefix="holistic-inventory-import-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(SCRATCH_DIR, 'inventory_import.db')}")
+
+from app import app, run_migrations, import_inventory_csv, Inventory  # noqa: E402
+
+HEADER = "name,barcode,quantity,price,cost_price,department,supplier\n"
+
+CATALOG = HEADER + (
+    "Coke,049000006000,24,1.99,0.85,Beverages,Coca-Cola\n"
+    "Chips,028400090858,12,3.49,1.60,Snacks,Frito-Lay\n"
+)
+
+BLANK_CELLS = HEADER + (
+    "Coke,049000006000,,,,,\n"          # Every cell but name and barcode blank
+    ",028400090858,,3.99,,,\n"          # Blank name and stock, new price
+    "Water,012000001291,,0.99,0.30,,\n"  # New item with a blank quantity
+)
+
+EXPECTED = {
+    "049000006000": ("Coke", 24, 1.99, 0.85, "Beverages"),
+    "028400090858": ("Chips", 12, 3.99, 1.60, "Snacks"),
+    "012000001291": ("Water", 0, 0.99, 0.30, None),
+}
+
+
+def import_csv(text):
+    """Import a CSV catalog and return the number of rows committed"""
+    count = 0
+    for count in import_inventory_csv(io.StringIO(text), 2):
+        pass
+    return count
+
+
+def main():
+    """Run the blank-cell import checks"""
+    print("🧪 Checking blank cells in inventory imports")
+    print("=" * 50)
+
+    failures = 0
+    with app.app_context():
+        run_migrations()
+        import_csv(CATALOG)
+        try:
+            import_csv(BLANK_CELLS)
+        except Exception as e:
+            print(f"❌ re-import with blank cells failed: {e}")
+            return False
+
+        for barcode, expected in EXPECTED.items():
+            item = Inventory.query.filter_by(barcode=barcode).one_or_none()
+            actual = item and (item.name, item.quantity, item.price, item.cost_price, item.department)
+            if actual != expected:
+                print(f"❌ {barcode}: {actual}, expected {expected}")
+                failures += 1
+            else:
+                print(f"✅ {barcode}: {actual}")
+
+    print()
+    print("🎉 Blank cells keep stored values!" if not failures else f"{failures} item(s) failed")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Query-count checks for the Holistic Retail Solution list pages
+
+Renders every list page in-process against a scratch SQLite database,
+once with a small data set and once with a larger one. A page passes only
+if it issues the same number of queries at both sizes and stays within
+MAX_QUERIES_PER_PAGE, which catches lazy loads (N+1) in templates.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+# Point the app at a scratch database before it is imported
+SCRATCH_DIR = tempfile.mkdtemp(prefix="holistic-query-counts-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(SCRATCH_DIR, 'query_counts.db')}")
+
+from sqlalchemy import event  # noqa: E402
+
+from app import (app, db, Contract, Inventory, Order, OrderItem, Payroll,  # noqa: E402
+                 PriceList, Sale, Staff, Supplier, WorkHour)
+
+MAX_QUERIES_PER_PAGE = 10
+
+PAGES = [
+    "/inventory/reports",
+    "/revenue/reports",
+    "/hr/payroll",
+    "/hr/timesheets",
+    "/orders/prices",
+    "/orders/contracts",
+    "/orders/suppliers",
+    "/suppliers",
+]
+
+
+def seed(rows):
+    """Fill every table the list pages read with rows records each"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        suppliers = [Supplier(name=f"Supplier {i}") for i in range(rows)]
+        staff = [Staff(name=f"Staff {i}", role="Cashier", pay=15.0, pay_type="Hourly") for i in range(rows)]
+        db.session.add_all(suppliers + staff)
+        db.session.flush()
+
+        items = [
+            Inventory(name=f"Item {i}", barcode=f"{i:012d}", quantity=i % 20, price=2.0, cost_price=1.0,
+                      supplier_id=suppliers[i].id, min_stock_level=5)
+            for i in range(rows)
+        ]
+        orders = [Order(date=datetime(2025, 1, 1) + timedelta(hours=i), staff_id=staff[i].id) for i in range(rows)]
+        db.session.add_all(items + orders)
+        db.session.flush()
+
+        today = date.today()
+        for i in range(rows):
+            db.session.add_all([
+                OrderItem(order_id=orders[i].id, inventory_id=items[i].id, quantity=1, price=2.0),
+                OrderItem(order_id=orders[i].id, inventory_id=items[(i + 1) % rows].id, quantity=2, price=2.0),
+                Sale(order_id=orders[i].id, total=6.0, date=orders[i].date),
+                WorkHour(staff_id=staff[i].id, date=today - timedelta(days=i % 7), hours_worked=8.5),
+                Payroll(staff_id=staff[i].id, pay_date=today - timedelta(days=i % 14), amount=500.0),
+                PriceList(supplier_id=suppliers[i].id, inventory_id=items[i].id, price=1.5, effective_date=today),
+                Contract(supplier_id=suppliers[i].id, contract_number=f"C-{i}", start_date=today,
+                         end_date=today + timedelta(days=365)),
+            ])
+        db.session.commit()
+
+
+def count_queries(path):
+    """Render a page and return (status code, number of SQL statements executed)"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = app.test_client().get(path)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return response.status_code, len(statements)
+
+
+def main():
+    """Run the query-count check for every list page"""
+    print("🧪 Checking query counts of list pages")
+    print("=" * 50)
+
+    counts = {}
+    for rows in (3, 30):
+        seed(rows)
+        for path in PAGES:
+            counts.setdefault(path, []).append(count_queries(path))
+
+    failures = 0
+    for path, ((small_status, small), (large_status, large)) in counts.items():
+        if small_status != 200 or large_status != 200:
+            print(f"❌ {path}: returned {small_status}/{large_status}")
+            failures += 1
+        elif small != large:
+            print(f"❌ {path}: {small} queries with 3 rows, {large} with 30 (grows with row count)")
+            failures += 1
+        elif large > MAX_QUERIES_PER_PAGE:
+            print(f"❌ {path}: {large} queries (limit {MAX_QUERIES_PER_PAGE})")
+            failures += 1
+        else:
+            print(f"✅ {path}: {large} queries")
+
+    print()
+    print("🎉 All pages issue a constant number of queries!" if not failures else f"{failures} page(s) failed")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
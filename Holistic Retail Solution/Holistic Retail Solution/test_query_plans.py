@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Query-plan checks for the Holistic Retail Solution hot filters
+
+Builds a scratch SQLite database through the migrations, runs every hot
+query once and asks SQLite for the EXPLAIN QUERY PLAN of each statement it
+issued. A query passes only if no step of its plan scans a whole table or
+walks a whole index, which catches filters that lost (or never had) a usable
+index and cursor conditions SQLite cannot seek on. List pages are checked
+from a cursor, since the first page of any indexed list is a cheap walk.
+"""
+
+import os
+import re
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+# Point the app at a scratch database before it is imported
+SCRATCH_DIR = tempfile.mkdtemp(prefix="holistic-query-plans-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(SCRATCH_DIR, 'query_plans.db')}")
+
+from sqlalchemy import event, insert  # noqa: E402
+
+from app import (app, db, run_migrations, rebuild_sales_rollup, keyset_paginate, sale_sort_date,  # noqa: E402
+                 inventory_stock_gap, margin_filter, MARGIN_SORTS,
+                 timesheet_rows, Contract, Inventory, Payroll, PriceList, Sale, Supplier, WorkHour)
+
+TODAY = date(2026, 1, 15)
+WEEK_START = TODAY - timedelta(days=TODAY.weekday())
+DEEP_SALES = 2000
+DEEP_CURSOR = DEEP_SALES - 7
+
+HOT_QUERIES = {
+    "low stock count": lambda: Inventory.query.filter(inventory_stock_gap <= 0).count(),
+    "out of stock count": lambda: Inventory.query.filter(Inventory.quantity == 0).count(),
+    "supplier by name": lambda: Supplier.query.filter_by(name="Fresh Farms").first(),
+    "staff timesheet": lambda: timesheet_rows(WEEK_START, WEEK_START + timedelta(days=6), staff_id=1),
+    "all staff timesheets": lambda: timesheet_rows(WEEK_START, WEEK_START + timedelta(days=6)),
+    "staff payroll history": lambda: Payroll.query.filter_by(staff_id=1).order_by(Payroll.pay_date.desc()).all(),
+    "sales since a date": lambda: Sale.query.filter(Sale.date >= TODAY).all(),
+    "sales list page": lambda: keyset_paginate(Sale.query, Sale, sale_sort_date, descending=True, after=1),
+    "sales list deep page": lambda: keyset_paginate(Sale.query, Sale, sale_sort_date, descending=True, after=DEEP_CURSOR),
+    "sales list previous page": lambda: keyset_paginate(Sale.query, Sale, sale_sort_date, descending=True,
+                                                        before=DEEP_CURSOR),
+    "payroll list deep page": lambda: keyset_paginate(Payroll.query, Payroll, Payroll.pay_date, descending=True,
+                                                      after=DEEP_CURSOR),
+    **{
+        f"margin list by {sort}, {order}": (
+            lambda sort=sort, order=order: keyset_paginate(
+                Inventory.query.filter(margin_filter), Inventory, MARGIN_SORTS[sort],
+                descending=order == "desc", after=DEEP_CURSOR
+            )
+        )
+        for sort in MARGIN_SORTS for order in ("asc", "desc")
+    },
+    "timesheet list deep page": lambda: keyset_paginate(WorkHour.query, WorkHour, WorkHour.date, descending=True,
+                                                        after=DEEP_CURSOR),
+    "sales rollup backfill": lambda: rebuild_sales_rollup(db.session.connection(), since=TODAY),
+    "current item price": lambda: PriceList.query.filter(
+        PriceList.inventory_id == 1, PriceList.effective_date <= TODAY
+    ).order_by(PriceList.effective_date.desc()).first(),
+    "expiring contracts": lambda: Contract.query.filter(
+        Contract.status == "Active", Contract.end_date <= TODAY + timedelta(days=30)
+    ).all(),
+}
+
+
+def capture(run):
+    """Run a hot query and return the (statement, parameters) pairs it executed"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        run()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+        db.session.rollback()
+    return statements
+
+
+def table_scans(statement, parameters):
+    """Return the plan steps of a statement that scan a whole table or walk a whole index
+
+    SQLite reports a seek as SEARCH; SCAN <table>, with or without USING
+    [COVERING] INDEX, reads every row of the table or index.
+    """
+    connection = db.session.connection().connection.driver_connection
+    plan = connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    scans = []
+    for _id, _parent, _unused, detail in plan:
+        match = re.match(r"SCAN (\w+)( AS \w+)?( USING (COVERING )?INDEX \w+)?$", detail)
+        if match and match.group(1) in db.metadata.tables:
+            scans.append(detail)
+    return scans
+
+
+def seed_sales():
+    """Add DEEP_SALES sales, many sharing a date and some undated, so cursors land deep in ties"""
+    db.session.execute(insert(Sale), [
+        {"total": 1.0, "date": datetime(2026, 1, 1) + timedelta(hours=index % 97) if index % 31 else None}
+        for index in range(DEEP_SALES)
+    ])
+    db.session.commit()
+
+
+def check_deep_cursor():
+    """Return the directions in which a page from a deep cursor differs from the full ordering"""
+    ordered = [sale.id for sale in Sale.query.order_by(sale_sort_date.desc(), Sale.id.desc())]
+    failures = []
+    for descending in (True, False):
+        if not descending:
+            ordered.reverse()
+        position = ordered.index(DEEP_CURSOR)
+        pages = {
+            "next": (keyset_paginate(Sale.query, Sale, sale_sort_date, descending=descending, after=DEEP_CURSOR),
+                     ordered[position + 1:position + 51]),
+            "previous": (keyset_paginate(Sale.query, Sale, sale_sort_date, descending=descending, before=DEEP_CURSOR),
+                         ordered[max(0, position - 50):position]),
+        }
+        for direction, (page, expected) in pages.items():
+            if [sale.id for sale in page.items] != expected:
+                failures.append(f"{direction} page, {'descending' if descending else 'ascending'}")
+    return failures
+
+
+def main():
+    """Run the query-plan check for every hot query"""
+    print("🧪 Checking query plans of hot filters")
+    print("=" * 50)
+
+    failures = 0
+    with app.app_context():
+        run_migrations()
+        seed_sales()
+        for name, run in HOT_QUERIES.items():
+            scans = []
+            for statement, parameters in capture(run):
+                scans += table_scans(statement, parameters)
+            if scans:
+                print(f"❌ {name}: {'; '.join(scans)}")
+                failures += 1
+            else:
+                print(f"✅ {name}")
+
+        wrong = check_deep_cursor()
+        if wrong:
+            print(f"❌ deep cursor pages: wrong rows on the {', '.join(wrong)}")
+            failures += 1
+        else:
+            print("✅ deep cursor pages")
+
+    print()
+    print("🎉 No hot query scans a whole table!" if not failures else f"{failures} query(ies) failed")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
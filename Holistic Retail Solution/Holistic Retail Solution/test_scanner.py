@@ -53,6 +53,33 @@ def test_barcode_scan(barcode):
         print(f"❌ Error scanning barcode: {e}")
         return False
 
+def test_batch_scan(barcodes):
+    """Test scanning several barcodes in one request"""
+    try:
+        response = requests.post(
+            f"{BASE_URL}/api/inventory/scan/batch",
+            json={"barcodes": barcodes},
+            headers={"Content-Type": "application/json"}
+        )
+        if response.status_code == 200:
+            data = response.json()
+            if not data.get('success'):
+                print(f"❌ Batch scan rejected: {data.get('error', 'Unknown error')}")
+                return False
+            print(f"✅ Batch scan: {data['found_count']} found, {data['not_found_count']} not found")
+            for result in data['results']:
+                if result['found']:
+                    print(f"   • {result['barcode']}: {result['item']['name']} - Qty: {result['item']['quantity']}")
+                else:
+                    print(f"   • {result['barcode']}: not found")
+            return True
+        else:
+            print(f"❌ Failed to batch scan: {response.status_code}")
+            return False
+    except Exception as e:
+        print(f"❌ Error batch scanning: {e}")
+        return False
+
 def test_add_new_item():
     """Test adding a new item"""
     try:
@@ -126,7 +153,13 @@ def main():
 
     print()
 
-    # Test 4: Test adding new item
+    # Test 4: Scan the same barcodes (plus an unknown one) in one batch
+    print("📦 Testing Batch Scan:")
+    test_batch_scan(sample_barcodes + ["000000000000"])
+
+    print()
+
+    # Test 5: Test adding new item
     print("➕ Testing Add New Item:")
     test_add_new_item()
 